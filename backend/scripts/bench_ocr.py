@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+OCR throughput (lines/s and images/s) with `--concurrency` requests in flight,
+for the engine configured under `ocr.engine`. Run once per engine to compare;
+--save keeps one engine's text per image, and --against reports how closely
+the other engine's text and PII findings match it:
+
+    PYTHONPATH=. python scripts/bench_ocr.py DIR [--concurrency 8] [--rounds 3] [--save pipeline.json]
+    PYTHONPATH=. python scripts/bench_ocr.py DIR --against pipeline.json   # with ocr.engine: split
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.core.config import settings
+from src.models.frame import decode_frame
+from src.models.ocr import ENGINE, ocr
+from src.models.pii_from_text import find_pii
+from src.models.registry import registry
+
+def _pii(texts: List[str]) -> Counter:
+    return Counter((m.kind, t[m.start:m.end]) for t in texts for m in find_pii(t))
+
+def parity(ref: Dict[str, List[str]], cur: Dict[str, List[str]]) -> Dict[str, float]:
+    """
+    Agreement of two engines' text per image: images read identically, lines
+    in common (as a multiset, order ignored) and PII findings in common.
+    """
+    names = sorted(set(ref) & set(cur))
+    same_lines = all_lines = same_pii = all_pii = 0
+    for name in names:
+        a, b = Counter(ref[name]), Counter(cur[name])
+        same_lines += sum((a & b).values()); all_lines += sum((a | b).values())
+        pa, pb = _pii(ref[name]), _pii(cur[name])
+        same_pii += sum((pa & pb).values()); all_pii += sum((pa | pb).values())
+    return {
+        "images": len(names),
+        "identical_images": sum(ref[n] == cur[n] for n in names) / max(len(names), 1),
+        "line_agreement": same_lines / all_lines if all_lines else 1.0,
+        "pii_agreement": same_pii / all_pii if all_pii else 1.0,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("root", type=Path, help="folder of images")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--save", type=Path, help="write the text read per image to this JSON file")
+    ap.add_argument("--against", type=Path, help="compare the text read with a --save file of another engine")
+    args = ap.parse_args()
+
+    side = settings.preprocess.get("ocr_max_side")
+    paths = [p for p in sorted(args.root.iterdir()) if p.is_file()]
+    frames = [decode_frame(p.read_bytes()).resized(side) for p in paths]
+    if not frames:
+        sys.exit(f"no images in {args.root}")
+    registry.warm_up(["ocr"])
+
+    work = frames * args.rounds
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        t0 = time.perf_counter()
+        results = list(pool.map(ocr, work))
+        elapsed = time.perf_counter() - t0
+    lines = sum(len(r) for r in results)
+
+    print(f"engine:      {ENGINE} (concurrency {args.concurrency})")
+    print(f"images:      {len(work)} in {elapsed:.1f} s  ({len(work) / elapsed:.2f}/s)")
+    print(f"lines:       {lines}  ({lines / elapsed:.1f}/s)")
+
+    texts = {p.name: [line.text for line in r] for p, r in zip(paths, results)}
+    if args.save:
+        args.save.write_text(json.dumps({"engine": ENGINE, "texts": texts}, ensure_ascii=False), encoding="utf-8")
+    if args.against:
+        ref = json.loads(args.against.read_text(encoding="utf-8"))
+        print(f"parity with {ref['engine']} ({args.against.name}):")
+        for key, value in parity(ref["texts"], texts).items():
+            print(f"  {key + ':':<18} {value:.2%}" if isinstance(value, float) else f"  {key + ':':<18} {value}")
+
+if __name__ == "__main__":
+    main()
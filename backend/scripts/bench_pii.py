@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput of the PII rule cascade (per-line prefilters, memoized phone
+validation) against the cascade before them, on a synthetic OCR-like corpus
+or on a local one (one line per doc). classify_ocr_text is compared with the
+old classifier, find_pii with the same cascade run without prefilters.
+
+    PYTHONPATH=. python scripts/bench_pii.py [--corpus lines.txt] [--lines 20000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import phonenumbers
+
+from src.models.pii_from_text import (
+    ADDRESS_CUES, BIC_RE, CARD_RE, DOB_RE, EMAIL_RE, IBAN_RE, LICENSE_PLATE_RE,
+    NATIONAL_ID_RE, PASSPORT_RE, RULES, PiiMatch, _phone_spans, classify_ocr_text, find_pii, phone_validator,
+)
+
+def legacy_classify(s: str) -> Optional[str]:
+    # classify_ocr_text before the prefilters and the phone memo, kept verbatim for comparison
+    # except for the phone region, which now comes from the config
+    s_clean = s.strip()
+    if not s_clean:
+        return None
+    if EMAIL_RE.search(s_clean):
+        return "email"
+    for m in re.finditer(r"[+()0-9\- \.]{7,}", s_clean):
+        cand = m.group(0)
+        try:
+            n = phonenumbers.parse(cand, phone_validator.default_region)
+            if phonenumbers.is_valid_number(n):
+                return "phone"
+        except Exception:
+            pass
+    for kind, rx in (
+        ("credit_card", CARD_RE), ("dob", DOB_RE), ("national_id", NATIONAL_ID_RE),
+        ("passport", PASSPORT_RE), ("iban", IBAN_RE), ("bic", BIC_RE),
+        ("license_plate", LICENSE_PLATE_RE), ("address_text", ADDRESS_CUES),
+    ):
+        if rx.search(s_clean):
+            return kind
+    return None
+
+def unfiltered_find_pii(s: str) -> List[PiiMatch]:
+    # find_pii with every rule run on every line, i.e. without the prefilters
+    accepted: List[PiiMatch] = []
+    for kind, rx in RULES:
+        spans = _phone_spans(s) if kind == "phone" else (m.span() for m in rx.finditer(s))
+        for start, end in spans:
+            if not any(start < a.end and a.start < end for a in accepted):
+                accepted.append(PiiMatch(kind, start, end))
+    return sorted(accepted, key=lambda m: m.start)
+
+def synthetic_corpus(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    words = "the a sunset beach coffee total subtotal thanks visit again receipt item qty price".split()
+    templates = [
+        lambda: " ".join(rng.choices(words, k=rng.randint(3, 9))),
+        lambda: f"{rng.choice(words).title()} x{rng.randint(1, 5)} {rng.randint(1, 99)}.{rng.randint(0, 99):02d}",
+        lambda: f"Contact: {rng.choice(['jane', 'li.wei', 'a_b'])}@{rng.choice(['mail.com', 'corp.sg'])}",
+        lambda: f"Tel +65 {rng.randint(6000, 9999)} {rng.randint(1000, 9999)}",
+        lambda: f"Card {' '.join(str(rng.randint(1000, 9999)) for _ in range(4))}",
+        lambda: f"DOB {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}",
+        lambda: f"NRIC S{rng.randint(1000000, 9999999)}{rng.choice('ABCDEFGHIZJ')}",
+        lambda: f"Blk {rng.randint(1, 999)} Ang Mo Kio Ave {rng.randint(1, 10)}",
+        lambda: f"SGX {rng.randint(1, 9999)} {rng.choice('ABCDEHJKLMPRSTXYZ')}",
+        lambda: f"INV-{rng.randint(10000, 99999)} 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:{rng.randint(0, 59):02d}",
+    ]
+    return [rng.choice(templates)() for _ in range(n)]
+
+def _time(fn: Callable[[str], Optional[str]], lines: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for line in lines:
+            fn(line)
+        best = min(best, time.perf_counter() - t0)
+    return len(lines) / best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", type=Path, help="text file, one OCR line per row")
+    ap.add_argument("--lines", type=int, default=20000, help="synthetic corpus size")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.corpus:
+        lines = args.corpus.read_text(encoding="utf-8").splitlines()
+    else:
+        lines = synthetic_corpus(args.lines)
+
+    legacy = _time(legacy_classify, lines, args.repeat)
+    current = _time(classify_ocr_text, lines, args.repeat)
+    unfiltered = _time(unfiltered_find_pii, lines, args.repeat)
+    spans = _time(find_pii, lines, args.repeat)
+    same = sum(legacy_classify(l) == classify_ocr_text(l) for l in lines)
+    same_spans = sum(unfiltered_find_pii(l) == find_pii(l) for l in lines)
+
+    print(f"lines:            {len(lines)}")
+    print("classify_ocr_text, first kind per line")
+    print(f"  legacy:         {legacy:,.0f} lines/s")
+    print(f"  prefiltered:    {current:,.0f} lines/s  ({current / legacy:.2f}x)")
+    print(f"  same label:     {same / len(lines):.2%}")
+    print("find_pii, every match per line")
+    print(f"  unfiltered:     {unfiltered:,.0f} lines/s")
+    print(f"  prefiltered:    {spans:,.0f} lines/s  ({spans / unfiltered:.2f}x)")
+    print(f"  same matches:   {same_spans / len(lines):.2%}")
+
+if __name__ == "__main__":
+    main()
@@ -12,12 +12,48 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+"""
+Prepares model files. With --export-onnx, also exports the YOLO weights to
+ONNX for `models.yolo_backend: onnx`, at a pinned opset and input size so
+the graphs are reproducible.
+
+    PYTHONPATH=. python scripts/download_models.py [--export-onnx]
+"""
+
+import argparse
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+BACKEND = Path(__file__).resolve().parents[1]
+YOLO_WEIGHTS = ["src/models/weights/yolov8n_100e.pt", "src/models/weights/yolov8n_landmarks.pt"]
+
+def export_onnx():
+    from ultralytics import YOLO
+
+    from src.models.yolo_onnx import ONNX_IMGSZ, ONNX_OPSET
+
+    for rel in YOLO_WEIGHTS:
+        pt = BACKEND / rel
+        if not pt.exists():
+            sys.exit(f"{pt} not found")
+        # dynamic axes give a free batch dimension; NMS stays outside the graph (NumPy)
+        out = YOLO(str(pt)).export(
+            format="onnx", imgsz=ONNX_IMGSZ, opset=ONNX_OPSET, dynamic=True, simplify=False, nms=False, half=False
+        )
+        print(f"Exported {pt.name} -> {out}")
+
 def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--export-onnx", action="store_true", help="export the YOLO weights to ONNX")
+    args = ap.parse_args()
+
     models = Path(__file__).parents[1] / "models"
     models.mkdir(parents=True, exist_ok=True)
     print(f"Models dir prepared at {models.resolve()}")
+    if args.export_onnx:
+        export_onnx()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Skip rate and false-skip rate of the pre-OCR text gate on a labeled local set:
+
+    DIR/text/*     images with text OCR should read (receipts, IDs, screenshots, signs)
+    DIR/no_text/*  images without any (selfies, scenery, pets)
+
+    PYTHONPATH=. python scripts/eval_text_gate.py DIR [--coarse-side 320] [--scores 2,3,4,5,6,8]
+
+A false skip hides every text finding of that image, so pick the largest
+min_score whose false-skip rate is still acceptable.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.models.frame import decode_frame
+from src.models.text_gate import TextGate
+
+def _scores(folder: Path, gate: TextGate, ocr_side: int) -> Tuple[List[int], float]:
+    scores, total_ms = [], 0.0
+    for path in sorted(p for p in folder.iterdir() if p.is_file()):
+        try:
+            frame = decode_frame(path.read_bytes())
+        except Exception as e:
+            print(f"skipping {path.name}: {e}", file=sys.stderr)
+            continue
+        # the service gates on the OCR-sized copy, so measure on the same input
+        image = frame.resized(ocr_side).image
+        t0 = time.perf_counter()
+        scores.append(gate.score(image))
+        total_ms += (time.perf_counter() - t0) * 1000.0
+    return scores, total_ms
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("root", type=Path, help="folder with text/ and no_text/ subfolders")
+    ap.add_argument("--coarse-side", type=int, default=320)
+    ap.add_argument("--ocr-side", type=int, default=1920)
+    ap.add_argument("--scores", default="2,3,4,5,6,8,10", help="min_score values to sweep")
+    args = ap.parse_args()
+
+    gate = TextGate(coarse_side=args.coarse_side)
+    text, text_ms = _scores(args.root / "text", gate, args.ocr_side)
+    plain, plain_ms = _scores(args.root / "no_text", gate, args.ocr_side)
+    n = len(text) + len(plain)
+    if not text or not plain:
+        sys.exit("need images in both text/ and no_text/")
+
+    print(f"images: {len(text)} text, {len(plain)} no_text; gate {(text_ms + plain_ms) / n:.1f} ms/image")
+    print(f"{'min_score':>9}  {'skip rate':>9}  {'false skip':>10}  {'no_text skipped':>15}")
+    for min_score in (int(s) for s in args.scores.split(",")):
+        false_skips = sum(s < min_score for s in text)
+        true_skips = sum(s < min_score for s in plain)
+        print(
+            f"{min_score:>9}  {(false_skips + true_skips) / n:>9.1%}"
+            f"  {false_skips / len(text):>10.1%}  {true_skips / len(plain):>15.1%}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Builds INT8 variants of the exported models and reports what they cost in
+accuracy and gain in latency against FP32.
+
+- faces / landmarks: static QDQ quantization of the ONNX graphs from
+  `download_models.py --export-onnx`, calibrated on letterboxed images
+  (tests/assets plus --corpus). The detection head stays FP32: box
+  regression is where INT8 hurts most and it is a small share of the FLOPs.
+- OCR recognition: dynamic quantization (weights INT8, activations
+  quantized on the fly) of a PaddleOCR recognition model exported to ONNX
+  with paddle2onnx, passed as --ocr-rec. It is evaluated on the text lines
+  PaddleOCR's detector finds in the images, cropped as the split engine
+  cuts them; pass --ocr-dict to also compare the decoded text.
+
+Outputs sit next to their FP32 graph as *.int8.onnx; serve the YOLO ones
+with `models.yolo_backend: onnx` and `models.variant: int8`, the OCR one
+with `ocr.engine: split`, `ocr.rec_onnx` and `ocr.rec_dict`. Without
+labelled data the FP32 detections (conf >= 0.25) serve as ground truth, so
+recall and mAP@0.5 measure agreement with FP32.
+
+    PYTHONPATH=. python scripts/quantize_models.py [--corpus DIR] [--ocr-rec rec.onnx [--ocr-dict en_dict.txt]] [--report PATH]
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2
+import numpy as np
+
+from src.models.yolo_onnx import YoloOnnx, letterbox, onnx_path
+
+BACKEND = Path(__file__).resolve().parents[1]
+YOLO_MODELS = {
+    "faces": "src/models/weights/yolov8n_100e.pt",
+    "landmarks": "src/models/weights/yolov8n_landmarks.pt",
+}
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+GT_CONF = 0.25
+
+def list_images(dirs: Sequence[Path]) -> List[Path]:
+    return sorted(p for d in dirs if d.is_dir() for p in d.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+
+def load_images(paths: Sequence[Path]) -> List[np.ndarray]:
+    images = [cv2.imread(str(p), cv2.IMREAD_COLOR) for p in paths]
+    return [im for im in images if im is not None]
+
+# --- quantization ---
+
+def _calibration_reader(images: Sequence[np.ndarray], input_name: str, size: int):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class LetterboxReader(CalibrationDataReader):
+        # feeds images exactly as YoloOnnx does at inference time
+        def __init__(self):
+            self._it: Iterator[np.ndarray] = iter(images)
+
+        def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+            image = next(self._it, None)
+            if image is None:
+                return None
+            padded, _, _ = letterbox(image, size)
+            x = padded[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+            return {input_name: np.ascontiguousarray(x)}
+
+    return LetterboxReader()
+
+def _head_nodes(model_path: str) -> List[str]:
+    # Ultralytics names nodes /model.<i>/...; the last module is the Detect head
+    import onnx
+
+    names = [n.name for n in onnx.load(model_path).graph.node]
+    index = [int(m.group(1)) for n in names if (m := re.match(r"/model\.(\d+)/", n))]
+    if not index:
+        return []
+    head = f"/model.{max(index)}/"
+    return [n for n in names if n.startswith(head)]
+
+def quantize_yolo(fp32: str, int8: str, calib: Sequence[np.ndarray], size: int):
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pre = str(Path(tmp) / "pre.onnx")
+        quant_pre_process(fp32, pre)
+        input_name = YoloOnnx(fp32)._get_session().get_inputs()[0].name
+        quantize_static(
+            pre,
+            int8,
+            _calibration_reader(calib, input_name, size),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=_head_nodes(pre),
+        )
+
+def quantize_ocr_rec(fp32: str, int8: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(fp32, int8, weight_type=QuantType.QInt8)
+
+# --- evaluation ---
+
+def _iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    x1 = np.maximum(box[0], boxes[:, 0]); y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2]); y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = lambda b: (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / (area(box) + area(boxes) - inter + 1e-9)
+
+def detection_scores(gts: List[np.ndarray], preds: List[np.ndarray], iou_th: float = 0.5) -> Dict[str, float]:
+    """
+    mAP@iou_th (all-point interpolated, mean over classes present in the
+    ground truth) and recall at GT_CONF, from per-image (N, 6) xyxy/conf/cls arrays.
+    """
+    classes = sorted({int(c) for g in gts for c in g[:, 5]})
+    aps, hits, total = [], 0, 0
+    for c in classes:
+        scores, tps, n_gt = [], [], 0
+        for gt, pred in zip(gts, preds):
+            g = gt[gt[:, 5] == c]
+            p = pred[pred[:, 5] == c]
+            p = p[np.argsort(-p[:, 4])]
+            n_gt += len(g)
+            used = np.zeros(len(g), dtype=bool)
+            for box in p:
+                tp = False
+                if len(g):
+                    iou = np.where(used, 0.0, _iou(box, g))
+                    j = int(iou.argmax())
+                    if iou[j] >= iou_th:
+                        used[j] = tp = True
+                        if box[4] >= GT_CONF:
+                            hits += 1
+                scores.append(box[4]); tps.append(tp)
+        total += n_gt
+        order = np.argsort(-np.asarray(scores))
+        tp = np.asarray(tps, dtype=float)[order]
+        recall = np.concatenate(([0.0], np.cumsum(tp) / max(n_gt, 1), [1.0]))
+        precision = np.concatenate(([1.0], np.cumsum(tp) / np.arange(1, len(tp) + 1), [0.0]))
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        aps.append(float(np.sum(np.diff(recall) * precision[1:])))
+    return {
+        "mAP50": float(np.mean(aps)) if aps else float("nan"),
+        "recall": hits / total if total else float("nan"),
+        "gt_boxes": total,
+    }
+
+def _latency_ms(fn, items: Sequence) -> Dict[str, float]:
+    fn(items[0])  # warm-up
+    times = []
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return {"mean": float(np.mean(times)), "p50": float(np.percentile(times, 50)), "p90": float(np.percentile(times, 90))}
+
+def evaluate_yolo(fp32: str, int8: str, images: Sequence[np.ndarray]) -> Dict[str, Dict]:
+    ref, cand = YoloOnnx(fp32), YoloOnnx(int8)
+    gts = [ref.predict([im], conf=GT_CONF)[0] for im in images]
+    preds = [cand.predict([im], conf=0.001)[0] for im in images]
+    return {
+        "accuracy": detection_scores(gts, preds),
+        "fp32_ms": _latency_ms(lambda im: ref.predict([im], conf=GT_CONF), images),
+        "int8_ms": _latency_ms(lambda im: cand.predict([im], conf=GT_CONF), images),
+    }
+
+def line_crops(images: Sequence[np.ndarray]) -> List[np.ndarray]:
+    # what the recognizer actually reads: PaddleOCR's detected text lines,
+    # rectified as the split engine cuts them
+    from paddleocr import TextDetection
+
+    from src.models.ocr import crop_quad
+
+    det = TextDetection()
+    crops = []
+    for im in images:
+        res = next(iter(det.predict(im)))
+        for poly in np.asarray(res.get("dt_polys", []), dtype=np.float32).reshape(-1, 4, 2):
+            crops.append(crop_quad(im, poly))
+    return crops
+
+def evaluate_ocr_rec(fp32: str, int8: str, crops: Sequence[np.ndarray], dict_path: Optional[str]) -> Dict[str, Dict]:
+    import onnxruntime as ort
+
+    from src.models.ocr_rec_onnx import ctc_decode, load_charset, rec_batch
+
+    ref = ort.InferenceSession(fp32, providers=["CPUExecutionProvider"])
+    cand = ort.InferenceSession(int8, providers=["CPUExecutionProvider"])
+    name = ref.get_inputs()[0].name
+    inputs = [rec_batch([c]) for c in crops]
+    charset = load_charset(dict_path) if dict_path else None
+    same = steps = same_lines = 0
+    for x in inputs:
+        pa, pb = ref.run(None, {name: x})[0], cand.run(None, {name: x})[0]
+        a, b = pa.argmax(axis=-1), pb.argmax(axis=-1)
+        same += int((a == b).sum()); steps += a.size
+        if charset is not None:
+            same_lines += ctc_decode(pa, charset)[0][0] == ctc_decode(pb, charset)[0][0]
+    # share of CTC time steps decoding to the same class as FP32, and (with
+    # --ocr-dict) of lines reading exactly the same text
+    accuracy = {"lines": len(crops), "ctc_argmax_agreement": same / steps if steps else float("nan")}
+    if charset is not None:
+        accuracy["line_agreement"] = same_lines / len(crops) if crops else float("nan")
+    return {
+        "accuracy": accuracy,
+        "fp32_ms": _latency_ms(lambda x: ref.run(None, {name: x}), inputs),
+        "int8_ms": _latency_ms(lambda x: cand.run(None, {name: x}), inputs),
+    }
+
+def render_report(results: Dict[str, Dict[str, Dict]], n_images: int) -> str:
+    lines = [
+        "# INT8 vs FP32",
+        "",
+        f"{n_images} images; ground truth = FP32 detections at conf >= {GT_CONF}.",
+        "",
+        "| model | set | accuracy | FP32 ms (mean / p90) | INT8 ms (mean / p90) | speed-up |",
+        "|---|---|---|---|---|---|",
+    ]
+    for key, r in results.items():
+        model, subset = key.split("@")
+        acc = ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in r["accuracy"].items())
+        f, q = r["fp32_ms"], r["int8_ms"]
+        lines.append(
+            f"| {model} | {subset} | {acc} | {f['mean']:.1f} / {f['p90']:.1f} | {q['mean']:.1f} / {q['p90']:.1f} "
+            f"| {f['mean'] / q['mean']:.2f}x |"
+        )
+    return "\n".join(lines) + "\n"
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", type=Path, help="directory of extra images for calibration and evaluation")
+    ap.add_argument("--calib-max", type=int, default=200, help="images used for calibration")
+    ap.add_argument("--ocr-rec", type=Path, help="PaddleOCR recognition model exported to ONNX")
+    ap.add_argument("--ocr-dict", type=Path, help="its character dictionary, to compare decoded lines")
+    ap.add_argument("--skip-quantize", action="store_true", help="only evaluate existing *.int8.onnx files")
+    ap.add_argument("--report", type=Path, default=BACKEND / "reports" / "quantization.md")
+    args = ap.parse_args()
+
+    subsets = {"assets": load_images(list_images([BACKEND / "tests" / "assets"]))}
+    if args.corpus:
+        subsets["corpus"] = load_images(list_images([args.corpus]))
+    calib = [im for ims in subsets.values() for im in ims][: args.calib_max]
+    if not calib:
+        sys.exit("no calibration images found")
+
+    results: Dict[str, Dict[str, Dict]] = {}
+    for model, pt in YOLO_MODELS.items():
+        fp32, int8 = onnx_path(str(BACKEND / pt)), onnx_path(str(BACKEND / pt), "int8")
+        if not Path(fp32).exists():
+            sys.exit(f"{fp32} not found; run scripts/download_models.py --export-onnx")
+        if not args.skip_quantize:
+            quantize_yolo(fp32, int8, calib, YoloOnnx(fp32).imgsz)
+            print(f"Quantized {Path(fp32).name} -> {Path(int8).name}")
+        for subset, images in subsets.items():
+            results[f"{model}@{subset}"] = evaluate_yolo(fp32, int8, images)
+
+    if args.ocr_rec:
+        rec_int8 = str(args.ocr_rec.with_suffix(".int8.onnx"))
+        if not args.skip_quantize:
+            quantize_ocr_rec(str(args.ocr_rec), rec_int8)
+            print(f"Quantized {args.ocr_rec.name} -> {Path(rec_int8).name}")
+        for subset, images in subsets.items():
+            crops = line_crops(images)
+            if not crops:
+                print(f"No text lines detected in {subset}; skipping OCR evaluation there")
+                continue
+            results[f"ocr_rec@{subset}"] = evaluate_ocr_rec(
+                str(args.ocr_rec), rec_int8, crops, str(args.ocr_dict) if args.ocr_dict else None
+            )
+
+    report = render_report(results, sum(len(ims) for ims in subsets.values()))
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    args.report.write_text(report, encoding="utf-8")
+    print(report)
+    print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    main()
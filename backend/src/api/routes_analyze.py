@@ -11,22 +11,238 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Body
-from typing import Optional
+import asyncio
+import contextlib
+import os
+import tempfile
+from pathlib import Path
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Body, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import FormData
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.concurrency import iterate_in_threadpool
+from typing import BinaryIO, Iterator, List, Optional
 
-from src.schemas.analyze_text import AnalyzeTextRequest, AnalyzeTextResponse
+from src.schemas.analyze_text import (
+    AnalyzeTextBatchRequest,
+    AnalyzeTextBatchResponse,
+    AnalyzeTextRequest,
+    AnalyzeTextResponse,
+)
 from src.schemas.analyze_image import AnalyzeImageResponse
-from src.services.image_pipeline import analyze_image
+from src.core.config import settings
+from src.models.frame import ImageDecodeError, ImageTooLargeError
+from src.services.image_pipeline import InvalidOptionError, analyze_image, parse_modes, resolve_policy
+from src.services.text_pipeline import analyze_text, analyze_texts
+from src.services.batch_pipeline import (
+    TAR_TYPES, ZIP_TYPES, Upload, analyze_images, iter_tar_images, iter_zip_images,
+)
+from src.services.video_pipeline import VideoDecodeError, analyze_video, probe_video, video_session
 
 router = APIRouter()
 
+IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp"}
+VIDEO_TYPES = {"video/mp4", "video/quicktime", "video/webm", "video/x-matroska"}
+
+# Text scanning is CPU-only regex work: plain `def` endpoints run it on the
+# threadpool, off the event loop.
+@router.post("/text", response_model=AnalyzeTextResponse)
+def analyze_text_endpoint(req: AnalyzeTextRequest):
+    return analyze_text(req.text)
+
+@router.post("/texts", response_model=AnalyzeTextBatchResponse)
+def analyze_texts_endpoint(req: AnalyzeTextBatchRequest):
+    max_texts = int(settings.text_api.get("max_texts", 10000))
+    if len(req.texts) > max_texts:
+        raise HTTPException(status_code=413, detail=f"At most {max_texts} texts per request")
+    return AnalyzeTextBatchResponse(results=analyze_texts(req.texts))
+
 @router.post("/image", response_model=AnalyzeImageResponse)
 async def analyze_image_endpoint(
     file: UploadFile = File(...),
     modes: Optional[str] = Form(None),
     policy: Optional[str] = Form(None),
 ):
-    if file.content_type not in {"image/jpeg", "image/png", "image/webp"}:
+    if file.content_type not in IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported image type")
     content = await file.read()
-    return await analyze_image(content, modes=modes, policy=policy)
+    try:
+        return await analyze_image(content, modes=modes, policy=policy)
+    except ImageDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidOptionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _iter_uploads(files: List[UploadFile]) -> Iterator[Upload]:
+    for f in files:
+        if f.content_type in ZIP_TYPES:
+            yield from iter_zip_images(f.file, f.filename)
+        elif f.content_type in TAR_TYPES:
+            yield from iter_tar_images(f.file, f.filename)
+        else:
+            yield f.filename, f.file.read()
+
+@router.post("/images", response_class=StreamingResponse)
+async def analyze_images_endpoint(request: Request):
+    """
+    Multipart form with any number of `files` (images, or zip/tar archives of
+    images) plus optional `modes` and `policy`. Streams one AnalyzeImageBatchItem
+    per image as NDJSON, in completion order.
+    """
+    # The form is parsed here rather than through File(...) params because
+    # FastAPI closes those uploads as soon as the endpoint returns, before the
+    # streamed body has been read from them.
+    form = await request.form(max_files=int(settings.batch_api.get("max_files", 1000)))
+    files = [v for v in form.getlist("files") if not isinstance(v, str)]
+    modes = form.get("modes") if isinstance(form.get("modes"), str) else None
+    policy = form.get("policy") if isinstance(form.get("policy"), str) else None
+
+    try:
+        parse_modes(modes)
+        resolve_policy(policy)
+    except InvalidOptionError as e:
+        await form.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    if not files:
+        await form.close()
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    unsupported = [f.filename for f in files if f.content_type not in IMAGE_TYPES | ZIP_TYPES | TAR_TYPES]
+    if unsupported:
+        await form.close()
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {', '.join(map(str, unsupported))}")
+
+    async def ndjson():
+        try:
+            # archive members are read/decompressed off the event loop
+            async for item in analyze_images(iterate_in_threadpool(_iter_uploads(files)), modes, policy):
+                yield item.model_dump_json() + "\n"
+        finally:
+            await form.close()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+def _spool(src: BinaryIO, suffix: str, limit: int) -> str:
+    # OpenCV decodes from a path; copy in chunks, giving up past `limit` bytes
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as dst:
+        copied = 0
+        while chunk := src.read(1 << 20):
+            copied += len(chunk)
+            if copied > limit:
+                dst.close()
+                os.unlink(dst.name)
+                raise HTTPException(status_code=413, detail=f"Video is larger than {limit >> 20} MB")
+            dst.write(chunk)
+        return dst.name
+
+# room for the multipart envelope and the form fields around the video
+_FORM_SLACK = 1 << 16
+
+class _UploadTooLarge(MultiPartException):
+    pass
+
+async def _capped_form(request: Request, limit: int) -> FormData:
+    """
+    The multipart form of `request`, refused with 413 once the body passes
+    `limit` bytes: on the declared Content-Length before any of it is read,
+    else while it streams in, closing the files spooled so far.
+    """
+    too_large = f"Video is larger than {limit >> 20} MB"
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit + _FORM_SLACK:
+        raise HTTPException(status_code=413, detail=too_large)
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    async def body():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit + _FORM_SLACK:
+                # the parser closes its spooled files on a MultiPartException
+                raise _UploadTooLarge(too_large)
+            yield chunk
+
+    try:
+        return await MultiPartParser(request.headers, body(), max_files=1).parse()
+    except _UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.message)
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+@router.post("/video", response_class=StreamingResponse)
+async def analyze_video_endpoint(request: Request):
+    """
+    A short video (MP4, MOV, WebM, MKV) as multipart `file`, plus optional
+    `modes` and `policy`, decoded server-side. Streams one VideoFrameResult
+    per frame as NDJSON, in frame order.
+    """
+    # The form is parsed here rather than through File(...) params so that an
+    # upload over video.max_upload_mb is refused before it is buffered.
+    limit = int(settings.video.get("max_upload_mb", 200)) << 20
+    form = await _capped_form(request, limit)
+    try:
+        file = form.get("file")
+        modes = form.get("modes") if isinstance(form.get("modes"), str) else None
+        policy = form.get("policy") if isinstance(form.get("policy"), str) else None
+        if file is None or isinstance(file, str):
+            raise HTTPException(status_code=400, detail="No file uploaded")
+        if file.content_type not in VIDEO_TYPES:
+            raise HTTPException(status_code=400, detail="Unsupported video type")
+        try:
+            parse_modes(modes)
+            resolve_policy(policy)
+        except InvalidOptionError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        path = await asyncio.to_thread(_spool, file.file, Path(file.filename or "").suffix or ".mp4", limit)
+    finally:
+        await form.close()
+    try:
+        await asyncio.to_thread(probe_video, path)
+    except VideoDecodeError as e:
+        os.unlink(path)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def ndjson():
+        try:
+            # closing the stream (client gone) closes the decoder with it
+            async with contextlib.aclosing(analyze_video(path, modes, policy)) as results:
+                async for result in results:
+                    yield result.model_dump_json() + "\n"
+        finally:
+            os.unlink(path)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.websocket("/stream")
+async def analyze_stream_endpoint(ws: WebSocket, modes: Optional[str] = None, policy: Optional[str] = None):
+    """
+    Live frames, e.g. from a camera. Each binary message is one encoded image
+    (JPEG/PNG/WebP). Each gets one VideoFrameResult JSON message back, in
+    order, or {"error": ...} if it cannot be decoded; so does a text message.
+    """
+    try:
+        session = video_session(modes, policy)
+    except InvalidOptionError as e:
+        await ws.close(code=1008, reason=str(e))
+        return
+    await ws.accept()
+    try:
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if data is None:
+                await ws.send_json({"error": "Expected a binary message holding an encoded image"})
+                continue
+            try:
+                result = await session.process_encoded(data)
+            except (ImageDecodeError, ImageTooLargeError) as e:
+                await ws.send_json({"error": str(e)})
+                continue
+            await ws.send_text(result.model_dump_json())
+    except WebSocketDisconnect:
+        pass
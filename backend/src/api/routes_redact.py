@@ -0,0 +1,107 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from typing import Optional, get_args
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import Response
+
+from src.models.frame import ImageDecodeError, ImageTooLargeError
+from src.schemas.common import KindImage
+from src.services.image_pipeline import InvalidOptionError, analyze_image_frame
+from src.services.inference_executor import inference_executor
+from src.services.redaction import FORMATS, METHODS, encode, redact, redaction_defaults
+from src.api.routes_analyze import IMAGE_TYPES
+
+router = APIRouter()
+
+# findings ride along in a header; past this size only the counts are sent
+_MAX_FINDINGS_HEADER = 8192
+
+def _kinds(kinds: Optional[str], default: list) -> set:
+    names = {k.strip() for k in (kinds or "").split(",") if k.strip()} or set(default)
+    unknown = names - set(get_args(KindImage))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kind(s): {', '.join(sorted(unknown))}")
+    return names
+
+@router.post("/image")
+async def redact_image_endpoint(
+    file: UploadFile = File(...),
+    modes: Optional[str] = Form(None),
+    policy: Optional[str] = Form(None),
+    kinds: Optional[str] = Form(None),
+    method: Optional[str] = Form(None),
+    format: Optional[str] = Form(None),
+    quality: Optional[int] = Form(None),
+):
+    """
+    Analyzes the image like POST /analyze/image and returns it re-encoded with
+    the findings of `kinds` (comma-separated; default `redact.kinds`, empty =
+    all) blurred, pixelated or filled. The analysis comes back in headers:
+    X-Risk-Score, X-Degraded, X-Redacted (boxes redacted) and X-Findings (the
+    findings as JSON, unless too large for a header).
+
+    When a detector stage ran out of its timeouts_ms budget, the findings are
+    incomplete, so instead of an image with some of them left readable it
+    answers 503; the result is not cached, so a retry recomputes it.
+
+    The output has the resolution the detectors saw, which is the upload's
+    own unless it was above max_image_mp.
+    """
+    if file.content_type not in IMAGE_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported image type")
+    opts = redaction_defaults()
+    method = (method or opts["method"]).lower()
+    fmt = (format or opts["format"]).lower()
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method: {method}; expected any of {', '.join(METHODS)}")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {fmt}; expected any of {', '.join(FORMATS)}")
+    selected = _kinds(kinds, opts["kinds"])
+
+    content = await file.read()
+    try:
+        result, frame = await analyze_image_frame(content, modes=modes, policy=policy)
+    except ImageDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidOptionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if result.degraded:
+        raise HTTPException(
+            status_code=503,
+            detail="A detector stage ran out of time, so the image was not redacted; retry",
+            headers={"Retry-After": "1", "X-Degraded": "true"},
+        )
+
+    boxes = [f.bbox for f in result.findings if not selected or f.kind in selected]
+
+    def _render():
+        image = redact(frame.image, boxes, method, pad=opts["pad"], blocks=opts["blocks"], fill_color=opts["fill_color"])
+        return encode(image, fmt, quality if quality is not None else opts["quality"])
+
+    body, media_type = await inference_executor.run(_render)
+
+    findings = json.dumps([f.model_dump(mode="json") for f in result.findings], separators=(",", ":"))
+    headers = {
+        "X-Risk-Score": str(result.riskScore),
+        "X-Degraded": str(result.degraded).lower(),
+        "X-Redacted": str(len(boxes)),
+    }
+    if len(findings) <= _MAX_FINDINGS_HEADER:
+        headers["X-Findings"] = findings
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -19,7 +19,23 @@ class Settings(BaseModel):
     policy_mode: str = "strict"
     risk_threshold: int = 60
     max_image_mp: int = 12
+    reject_image_mp: int = 100
+    serving: dict = {}
+    models: dict = {}
+    preprocess: dict = {}
+    text_gate: dict = {}
+    tiling: dict = {}
     timeouts_ms: dict = {}
+    inference: dict = {}
+    batching: dict = {}
+    ocr: dict = {}
+    batch_api: dict = {}
+    text_api: dict = {}
+    video: dict = {}
+    redact: dict = {}
+    result_cache: dict = {}
+    near_duplicate: dict = {}
+    pii: dict = {}
     conf_thresholds: dict = {}
     weights: dict = {}
 
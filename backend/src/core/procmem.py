@@ -0,0 +1,44 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+from typing import Dict
+
+_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_mb",
+    "Shared_Dirty": "shared_mb",
+    "Private_Clean": "uss_mb",
+    "Private_Dirty": "uss_mb",
+}
+
+def process_memory(pid: str = "self") -> Dict[str, float]:
+    """
+    Memory of a process in MB from /proc/<pid>/smaps_rollup (Linux only; {} elsewhere).
+
+    rss counts pages shared with forked siblings in full, pss splits them
+    evenly, and uss is what the process alone holds, i.e. what one more
+    worker costs.
+    """
+    try:
+        text = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return {}
+    out = {key: 0.0 for key in _FIELDS.values()}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        key = _FIELDS.get(name)
+        if key is not None:
+            out[key] += int(rest.split()[0]) / 1024.0  # kB
+    return out
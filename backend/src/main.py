@@ -11,14 +11,43 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from fastapi import FastAPI
+import os
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from loguru import logger
 
 from src.api.routes_analyze import router as analyze_router
+from src.api.routes_redact import router as redact_router
 from src.core.config import settings
 from src.core.logging import configure_logging
+from src.core.procmem import process_memory
+from src.models.pii_from_text import phone_validator
+from src.models.registry import registry
+from src.models.text_gate import text_gate
+from src.services.ocr_cascade import ocr_cascade
+from src.services.inference_executor import InferenceQueueFull, inference_executor
+from src.services.result_cache import result_cache
+from src.services.phash_index import phash_index
+
+def _warm_up():
+    registry.warm_up(settings.models.get("warmup", []))
+    # after warm-up the worker holds its steady-state buffers; uss is what it adds
+    # on top of pages shared with the serving parent and its siblings
+    logger.info(f"worker {os.getpid()} ready: {process_memory()}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up off the event loop: the process is live (/healthz) right away
+    # and reports ready (/readyz) once the models have run once.
+    threading.Thread(target=_warm_up, name="model-warmup", daemon=True).start()
+    yield
+    inference_executor.shutdown(wait=False)
 
-app = FastAPI(title="Obscura API", version="0.1.0")
+app = FastAPI(title="Obscura API", version="0.1.0", lifespan=lifespan)
 configure_logging()
 
 app.add_middleware(
@@ -29,8 +58,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(InferenceQueueFull)
+async def inference_queue_full_handler(request: Request, exc: InferenceQueueFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 @app.get("/healthz")
 def healthz():
     return {"ok": True, "policy_mode": settings.policy_mode, "version": "0.1.0"}
 
+@app.get("/readyz")
+def readyz():
+    ready = registry.is_ready(settings.models.get("warmup", []))
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "models": registry.status()})
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "inference": {
+            "in_flight": inference_executor.in_flight,
+            "abandoned": inference_executor.abandoned,
+            "capacity": inference_executor.capacity,
+        },
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "near_duplicate": phash_index.stats() if phash_index is not None else None,
+        "phone_validator": phone_validator.stats(),
+        "text_gate": text_gate.stats() if text_gate is not None else None,
+        "ocr_cascade": ocr_cascade.stats() if ocr_cascade is not None else None,
+        "process": {"pid": os.getpid(), **process_memory()},
+    }
+
 app.include_router(analyze_router, prefix="/analyze", tags=["analyze"])
+app.include_router(redact_router, prefix="/redact", tags=["redact"])
@@ -0,0 +1,122 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FuturesTimeout
+from typing import Any, Callable, List, Optional, Sequence
+
+from src.core.config import settings
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching for a model call.
+
+    Callers on any thread `submit()` single items. A background thread takes the
+    first waiting item, keeps collecting for up to `max_wait_ms` or until
+    `max_batch` items are queued, then calls `batch_fn(items)` once and scatters
+    the returned list (one result per item, same order) back to the callers.
+
+    A call waits at most `timeout_ms` (None = forever) for its result, then
+    fails with TimeoutError: a hung batch_fn wedges the batch thread, which
+    cannot be interrupted, but not the callers' threads with it. Their items
+    are dropped if still queued, and late results are discarded.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Sequence[Any]], List[Any]],
+        max_batch: int = 8,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+        timeout_ms: Optional[float] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.timeout = float(timeout_ms) / 1000.0 if timeout_ms is not None else None
+        self.name = name
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        # Started lazily (and restarted after a fork, where it does not survive).
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        self._ensure_thread()
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    def __call__(self, item: Any) -> Any:
+        fut = self.submit(item)
+        try:
+            return fut.result(timeout=self.timeout)
+        except FuturesTimeout:
+            err = TimeoutError(f"{self.name}: no result within {self.timeout:g} s")
+            if not fut.cancel():
+                # already in a batch: fail it, unless the result just came in
+                try:
+                    fut.set_exception(err)
+                except InvalidStateError:
+                    return fut.result()
+            raise err from None
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[tuple]):
+        batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                _settle(fut.set_exception, e)
+            return
+        for (_, fut), res in zip(batch, results):
+            _settle(fut.set_result, res)
+
+def _settle(setter: Callable[[Any], None], value: Any):
+    # a caller that timed out has failed its future already
+    try:
+        setter(value)
+    except InvalidStateError:
+        pass
+
+def batcher_from_settings(batch_fn: Callable[[Sequence[Any]], List[Any]], name: str) -> Optional[MicroBatcher]:
+    """
+    Builds a MicroBatcher from the `batching` section of the config, or returns None when batching is disabled.
+    """
+    cfg = dict(settings.batching)
+    if not cfg.pop("enabled", False):
+        return None
+    return MicroBatcher(batch_fn, name=name, **cfg)
@@ -11,65 +11,46 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import io
-from huggingface_hub import hf_hub_download
-from ultralytics import YOLO
-from supervision import Detections
-from PIL import Image, ImageFile
-from typing import List, Tuple
+import threading
+from typing import List, Sequence, Tuple
 
-# download model
-model_path = "src/models/weights/yolov8n_100e.pt"
-ImageFile.LOAD_TRUNCATED_IMAGES = True
+from src.models.batching import batcher_from_settings
+from src.models.frame import Frame
+from src.models.postprocess import box_tuples, normalize_detections
+from src.models.registry import dummy_frame, registry
+from src.models.yolo_onnx import load_yolo, yolo_predict
 
-# load model
-model = YOLO(model_path)
+model_path = "src/models/weights/yolov8n_100e.pt"
 
-def _pil_from_bytes(img_bytes: bytes) -> Image.Image:
-    return Image.open(io.BytesIO(img_bytes)).convert("RGB")
+# Ultralytics predictors are not thread-safe; inference runs on a thread pool
+# (ONNX Runtime sessions are, but batches are already merged by the batcher)
+_lock = threading.Lock()
 
-def faces(img_bytes: bytes, conf_th: float = 0.5) -> List[Tuple[float, float, float, float, float]]:
+def faces_batch(items: Sequence[Tuple[Frame, float]]) -> List[List[Tuple[float, float, float, float, float]]]:
     """
-    Returns a list of detections: [(x, y, w, h, conf)], with (x,y,w,h) normalized to [0..1].
+    Runs one batched predict over [(frame, conf_th), ...] and returns the per-frame detections in order.
     """
-    pil_img = _pil_from_bytes(img_bytes)
-    W, H = pil_img.size
+    conf = min(c for _, c in items)
 
-    # Run inference (ultralytics handles resizing/letterbox internally)
+    # Run inference (both backends letterbox internally)
     # We pass conf= to filter low scores in the model output already.
-    results = model.predict(source=pil_img, conf=conf_th, verbose=False)
-
-    out: List[Tuple[float, float, float, float, float]] = []
-    if not results or results[0] is None or results[0].boxes is None:
-        return out
-
-    boxes_xyxy = results[0].boxes.xyxy  # tensor [N,4] in original image coords
-    scores     = results[0].boxes.conf  # tensor [N]
+    # NumPy input is read as BGR, which is what Frame holds.
+    model = registry.get("faces")
+    with _lock:
+        results = yolo_predict(model, [f.image for f, _ in items], conf=conf)
 
-    # Convert tensors to CPU numpy
-    if hasattr(boxes_xyxy, "cpu"):
-        boxes_xyxy = boxes_xyxy.cpu().numpy()
-    if hasattr(scores, "cpu"):
-        scores = scores.cpu().numpy()
+    # a batch is predicted at its lowest conf; apply each caller's threshold
+    return [box_tuples(normalize_detections(r, f.width, f.height, c)) for r, (f, c) in zip(results, items)]
 
-    for (x1, y1, x2, y2), s in zip(boxes_xyxy, scores):
-        # clip to image
-        x1 = float(max(0.0, min(x1, W)))
-        y1 = float(max(0.0, min(y1, H)))
-        x2 = float(max(0.0, min(x2, W)))
-        y2 = float(max(0.0, min(y2, H)))
+_batcher = batcher_from_settings(faces_batch, name="faces-batcher")
 
-        # normalize
-        x = x1 / W
-        y = y1 / H
-        w = max(0.0, (x2 - x1) / W)
-        h = max(0.0, (y2 - y1) / H)
-        conf = float(s)
-
-        # filter any degenerate boxes that survived
-        if w <= 0 or h <= 0:
-            continue
-
-        out.append((x, y, w, h, conf))
+def faces(frame: Frame, conf_th: float = 0.5) -> List[Tuple[float, float, float, float, float]]:
+    """
+    Returns a list of detections: [(x, y, w, h, conf)], with (x,y,w,h) normalized to [0..1].
+    Concurrent callers are micro-batched into one predict call when batching is enabled.
+    """
+    if _batcher is not None:
+        return _batcher((frame, conf_th))
+    return faces_batch([(frame, conf_th)])[0]
 
-    return out
\ No newline at end of file
+registry.register("faces", lambda: load_yolo(model_path), warmup=lambda: faces(dummy_frame()))
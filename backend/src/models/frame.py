@@ -0,0 +1,149 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np, cv2
+from PIL import Image, ImageFile, ImageOps
+
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+# Size limits are enforced by decode_frame (max_mp / reject_mp) instead of PIL's bomb check
+Image.MAX_IMAGE_PIXELS = None
+
+_EXIF_ORIENTATION = 0x0112
+
+class ImageDecodeError(ValueError):
+    pass
+
+class ImageTooLargeError(ValueError):
+    pass
+
+@dataclass(frozen=True)
+class Frame:
+    """
+    An uploaded image decoded once and shared by every detector of a request.
+
+    `image` is an HxWx3 uint8 BGR array, the layout PaddleOCR and Ultralytics
+    both accept for NumPy input, so detectors pass it through without copying.
+    Detectors must treat it as read-only.
+    `orientation` is the EXIF orientation tag of the upload; it has already
+    been applied to `image`.
+    `source_shape` is the (H, W) of the upload itself, which is larger than
+    `shape` when the image was downsampled on decode.
+    """
+    image: np.ndarray
+    orientation: int = 1
+    source_shape: Optional[Tuple[int, int]] = None
+    _resized: Dict[int, "Frame"] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _resize_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    @property
+    def height(self) -> int:
+        return int(self.image.shape[0])
+
+    @property
+    def width(self) -> int:
+        return int(self.image.shape[1])
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        # (H, W), same convention as AnalyzeImageResponse.imageShape
+        return self.height, self.width
+
+    def resized(self, max_side: Optional[int]) -> "Frame":
+        """
+        Returns this frame scaled down so its longer side is at most `max_side`
+        (never upscaled). Detectors report normalized coordinates, so their
+        boxes need no remapping. Results are cached per size, which lets the
+        face and landmark models share one 640 px copy.
+        """
+        if not max_side or max(self.shape) <= max_side:
+            return self
+        with self._resize_lock:
+            cached = self._resized.get(max_side)
+            if cached is None:
+                scale = max_side / max(self.shape)
+                size = (max(1, round(self.width * scale)), max(1, round(self.height * scale)))
+                img = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+                cached = Frame(image=img, orientation=self.orientation, source_shape=self.source_shape)
+                self._resized[max_side] = cached
+            return cached
+
+def _probe(img_bytes: bytes) -> Tuple[Optional[Tuple[int, int]], int]:
+    """
+    Returns ((H, W) after orientation, EXIF orientation) from the header alone;
+    Image.open never decodes pixels here.
+    """
+    try:
+        with Image.open(io.BytesIO(img_bytes)) as im:
+            w, h = im.size
+            orientation = int(im.getexif().get(_EXIF_ORIENTATION, 1))
+    except Exception:
+        return None, 1
+    # orientations 5..8 rotate by 90 degrees
+    if orientation in (5, 6, 7, 8):
+        w, h = h, w
+    return (h, w), orientation
+
+def _decode_with_pil(img_bytes: bytes) -> Optional[np.ndarray]:
+    # Fallback for inputs OpenCV refuses (e.g. truncated uploads).
+    try:
+        with Image.open(io.BytesIO(img_bytes)) as im:
+            rgb = ImageOps.exif_transpose(im).convert("RGB")
+            return cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+    except Exception:
+        return None
+
+def _reduced_flag(pixels: int, max_pixels: float) -> int:
+    # Largest decode-time reduction that still leaves at least max_pixels;
+    # libjpeg does these in the DCT domain, so the full image is never materialised.
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if pixels / (factor * factor) >= max_pixels:
+            return flag
+    return cv2.IMREAD_COLOR
+
+def decode_frame(img_bytes: bytes, max_mp: Optional[float] = None, reject_mp: Optional[float] = None) -> Frame:
+    """
+    Decodes `img_bytes` into a Frame. Raises ImageDecodeError if the bytes are not a readable image.
+
+    Images above `max_mp` megapixels are downsampled to that size while decoding;
+    images above `reject_mp` raise ImageTooLargeError before any pixel is decoded.
+    """
+    source_shape, orientation = _probe(img_bytes)
+    pixels = source_shape[0] * source_shape[1] if source_shape else None
+    if pixels is not None and reject_mp and pixels > reject_mp * 1e6:
+        raise ImageTooLargeError(f"Image is {pixels / 1e6:.1f} MP; the limit is {reject_mp} MP")
+
+    flag = cv2.IMREAD_COLOR
+    if pixels is not None and max_mp and pixels > max_mp * 1e6:
+        flag = _reduced_flag(pixels, max_mp * 1e6)
+
+    arr = np.frombuffer(img_bytes, np.uint8)
+    # IMREAD_COLOR (and the REDUCED variants) apply the EXIF orientation while decoding.
+    img = cv2.imdecode(arr, flag)
+    if img is None:
+        img = _decode_with_pil(img_bytes)
+    if img is None:
+        raise ImageDecodeError("Could not decode image")
+
+    h, w = img.shape[:2]
+    if source_shape is None:
+        source_shape = (h, w)
+    if max_mp and h * w > max_mp * 1e6:
+        scale = math.sqrt(max_mp * 1e6 / (h * w))
+        img = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return Frame(image=img, orientation=orientation, source_shape=source_shape)
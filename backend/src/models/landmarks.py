@@ -1,40 +1,49 @@
 # src/models/landmarks.py
 
-from ultralytics import YOLO
+import threading
 import numpy as np
-from io import BytesIO
-from PIL import Image
+from typing import Sequence, Tuple
+
+from src.models.batching import batcher_from_settings
+from src.models.frame import Frame
+from src.models.postprocess import class_box_tuples, normalize_detections
+from src.models.registry import dummy_frame, registry
+from src.models.yolo_onnx import load_yolo, yolo_predict
 
 CLASSES = [
     "person", "rider", "car", "truck", "bus", "train",
     "motorcycle", "bicycle", "traffic light", "traffic sign", "building"
 ]
 
-# load once at import time
-_model = YOLO("src/models/weights/yolov8n_landmarks.pt")
+model_path = "src/models/weights/yolov8n_landmarks.pt"
+
+_lock = threading.Lock()
+
+def landmarks_batch(items: Sequence[Tuple[Frame, float]]):
+    """
+    Runs one batched predict over [(frame, conf_th), ...] and returns the per-frame findings in order.
+    """
+    conf = min(c for _, c in items)
+    model = registry.get("landmarks")
+    with _lock:
+        results = yolo_predict(model, [f.image for f, _ in items], conf=conf)
+
+    # a batch is predicted at its lowest conf; apply each caller's threshold
+    return [
+        class_box_tuples(normalize_detections(r, f.width, f.height, c, num_classes=len(CLASSES)), CLASSES)
+        for r, (f, c) in zip(results, items)
+    ]
 
-def landmarks(img_bytes: bytes, conf_th: float = 0.25):
+_batcher = batcher_from_settings(landmarks_batch, name="landmarks-batcher")
+
+def landmarks(frame: Frame, conf_th: float = 0.25):
     """
     Run YOLO landmarks detection.
-    Returns list of (class_name, x, y, w, h, conf) with normalized coords.
+    Returns list of (class_name, x, y, w, h, conf) with normalized top-left (x,y,w,h), like faces().
+    Concurrent callers are micro-batched into one predict call when batching is enabled.
     """
-    img = Image.open(BytesIO(img_bytes)).convert("RGB")
-    results = _model.predict(img, conf=conf_th, verbose=False)
-
-    findings = []
-    for r in results:
-        h, w = r.orig_shape
-        for box in r.boxes:
-            cls_id = int(box.cls.item())
-            class_name = CLASSES[cls_id] if cls_id < len(CLASSES) else str(cls_id)
-            conf = float(box.conf.item())
-
-            # convert to normalized xywh
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            cx = (x1 + x2) / 2 / w
-            cy = (y1 + y2) / 2 / h
-            bw = (x2 - x1) / w
-            bh = (y2 - y1) / h
-
-            findings.append((class_name, cx, cy, bw, bh, conf))
-    return findings
+    if _batcher is not None:
+        return _batcher((frame, conf_th))
+    return landmarks_batch([(frame, conf_th)])[0]
+
+registry.register("landmarks", lambda: load_yolo(model_path), warmup=lambda: landmarks(dummy_frame()))
@@ -11,13 +11,59 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Tuple, Optional
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Callable, List, NamedTuple, Sequence, Tuple, Optional
 import numpy as np, cv2
-from paddleocr import PaddleOCR
 
-# Initialize once at import
-# lang="en" covers English; switch to "ch" or "en_ppocr_mobile_v2.0" variants if needed
-_OCR = PaddleOCR(use_textline_orientation=True, lang="en")
+from src.core.config import settings
+from src.models.batching import MicroBatcher
+from src.models.frame import Frame
+from src.models.registry import dummy_frame, registry
+
+# pipeline: PaddleOCR end to end, one image per call
+# split: text detection per image, recognition pooled across concurrent requests
+_CFG = dict(settings.ocr)
+ENGINE = _CFG.get("engine", "pipeline")
+
+class SplitOcr(NamedTuple):
+    det: object
+    cls: Optional[object]  # text-line orientation (0/180 degrees), optional
+    rec: object
+
+    def read(self, crops: Sequence[np.ndarray]) -> List[Tuple[str, float]]:
+        crops = list(crops)
+        if self.cls is not None:
+            for i, res in enumerate(self.cls.predict(crops, batch_size=len(crops))):
+                if int(res["class_ids"][0]) == 1:  # 180_degree
+                    crops[i] = cv2.rotate(crops[i], cv2.ROTATE_180)
+        return [(str(res["rec_text"]), float(res["rec_score"])) for res in self.rec.predict(crops, batch_size=len(crops))]
+
+def _load_rec():
+    rec_onnx = _CFG.get("rec_onnx")
+    if not rec_onnx:
+        from paddleocr import TextRecognition
+        return TextRecognition()
+    from src.models.ocr_rec_onnx import OnnxTextRecognition
+    from src.models.yolo_onnx import onnx_path
+    return OnnxTextRecognition(
+        onnx_path(rec_onnx, settings.models.get("variant", "fp32")),
+        _CFG.get("rec_dict") or "",
+        threads=settings.models.get("onnx_threads"),
+    )
+
+def _load():
+    if ENGINE == "split":
+        from paddleocr import TextDetection, TextLineOrientationClassification
+        cls = TextLineOrientationClassification() if _CFG.get("textline_orientation", True) else None
+        return SplitOcr(det=TextDetection(), cls=cls, rec=_load_rec())
+    from paddleocr import PaddleOCR
+    # lang="en" covers English; switch to "ch" or "en_ppocr_mobile_v2.0" variants if needed
+    return PaddleOCR(use_textline_orientation=True, lang="en")
+
+# PaddleOCR pipelines are not safe to call from several threads at once
+_lock = threading.Lock()
 
 def _norm_bbox_from_poly(poly: np.ndarray, w: int, h: int) -> Tuple[float, float, float, float]:
     xs = poly[:, 0]; ys = poly[:, 1]
@@ -33,24 +79,117 @@ def _norm_bbox_from_box(box: np.ndarray, w: int, h: int) -> Tuple[float, float,
     bw = min(1.0, (x2 - x1) / w); bh = min(1.0, (y2 - y1) / h)
     return x, y, bw, bh
 
-def ocr(img_bytes: bytes) -> List[Tuple[str, Tuple[float, float, float, float], float]]:
+class OcrLine(NamedTuple):
+    text: str
+    bbox: Tuple[float, float, float, float]  # (x,y,w,h) normalized 0..1
+    conf: float
+    quad: np.ndarray  # (4,2) normalized polygon, clockwise from top-left
+
+def _quad_from_bbox(bbox: Tuple[float, float, float, float]) -> np.ndarray:
+    x, y, bw, bh = bbox
+    return np.array([[x, y], [x + bw, y], [x + bw, y + bh], [x, y + bh]], dtype=np.float32)
+
+def crop_quad(image: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """
+    Rectified crop of a text-line polygon, as PaddleOCR cuts them for
+    recognition: perspective-warped to an upright rectangle, and turned
+    90 degrees when it comes out much taller than wide.
+    """
+    poly = np.asarray(poly, dtype=np.float32)
+    w = int(max(np.linalg.norm(poly[0] - poly[1]), np.linalg.norm(poly[2] - poly[3])))
+    h = int(max(np.linalg.norm(poly[0] - poly[3]), np.linalg.norm(poly[1] - poly[2])))
+    w, h = max(w, 1), max(h, 1)
+    dst = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float32)
+    crop = cv2.warpPerspective(
+        image, cv2.getPerspectiveTransform(poly, dst), (w, h),
+        borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC,
+    )
+    return np.rot90(crop) if h / w >= 1.5 else crop
+
+def read_sorted(
+    crops: Sequence[np.ndarray],
+    read: Callable[[Sequence[np.ndarray]], List[Tuple[str, float]]],
+    batch_size: int,
+) -> List[Tuple[str, float]]:
     """
-    Returns: list of (text, (x,y,w,h) normalized 0..1, conf 0..1)
+    Runs `read` over `crops` in chunks of `batch_size`, grouped by aspect
+    ratio so each chunk pads its lines to similar widths; results come back in
+    the order of `crops`.
+    """
+    order = sorted(range(len(crops)), key=lambda i: crops[i].shape[1] / max(crops[i].shape[0], 1))
+    out: List[Optional[Tuple[str, float]]] = [None] * len(crops)
+    for k in range(0, len(order), batch_size):
+        idx = order[k:k + batch_size]
+        for i, res in zip(idx, read([crops[i] for i in idx])):
+            out[i] = res
+    return out
+
+def _read_pooled(crops: Sequence[np.ndarray]) -> List[Tuple[str, float]]:
+    return read_sorted(crops, registry.get("ocr").read, int(_CFG.get("rec_batch", 16)))
+
+# Text-line crops from every in-flight request share one recognizer queue;
+# each pooling round drains up to max_pending crops and sorts them together.
+_rec_batcher = MicroBatcher(
+    _read_pooled,
+    max_batch=_CFG.get("max_pending", 64),
+    max_wait_ms=_CFG.get("max_wait_ms", 5),
+    name="ocr-rec-batcher",
+)
+
+# upper bound on one image's wait for its lines, so a stalled recognizer cannot
+# hold a worker thread forever
+_REC_TIMEOUT_S = float(_CFG.get("rec_timeout_ms", 8000)) / 1000.0
+
+def _reading_order(polys: np.ndarray) -> np.ndarray:
+    # top to bottom, then left to right within roughly the same row
+    if len(polys) == 0:
+        return polys
+    tops = polys[:, :, 1].min(axis=1)
+    lefts = polys[:, :, 0].min(axis=1)
+    return polys[np.lexsort((lefts, np.round(tops / 10.0)))]
+
+def _predict_split(engine: SplitOcr, image: np.ndarray) -> dict:
+    with _lock:
+        det = next(iter(engine.det.predict(image)))
+    polys = _reading_order(np.asarray(det.get("dt_polys", []), dtype=np.float32).reshape(-1, 4, 2))
+    futures = [_rec_batcher.submit(crop_quad(image, poly)) for poly in polys]
+    texts, scores, kept = [], [], []
+    deadline = time.monotonic() + _REC_TIMEOUT_S
+    try:
+        for poly, fut in zip(polys, futures):
+            text, conf = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+            if text:
+                texts.append(text)
+                scores.append(conf)
+                kept.append(poly)
+    except FuturesTimeout:
+        # lines still queued are dropped rather than read for nobody
+        for fut in futures:
+            fut.cancel()
+        raise TimeoutError(f"text recognition of {len(futures)} lines took over {_REC_TIMEOUT_S:g} s") from None
+    return {"rec_texts": texts, "rec_scores": scores, "rec_polys": kept}
+
+def ocr(frame: Frame) -> List[OcrLine]:
+    """
+    Returns: list of OcrLine(text, (x,y,w,h) normalized 0..1, conf 0..1, quad)
     Compatible with both:
       - NEW pipeline: [{'rec_texts': [...], 'rec_scores': [...], 'rec_polys': [...], 'rec_boxes': ...}, ...]
       - CLASSIC: [ [pts, (text, score)], ... ] in result[0]
+    With `ocr.engine: split` the page is assembled here from the detector's
+    polygons and the pooled recognizer's texts, in the same shape.
     """
-    arr = np.frombuffer(img_bytes, np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    if img is None:
-        return []
-    h, w = img.shape[:2]
+    h, w = frame.shape
 
-    result = _OCR.predict(img)
-    out: List[Tuple[str, Tuple[float, float, float, float], float]] = []
+    engine = registry.get("ocr")
+    if isinstance(engine, SplitOcr):
+        page = _predict_split(engine, frame.image)
+    else:
+        with _lock:
+            result = engine.predict(frame.image)
+        page = result[0]
+    out: List[OcrLine] = []
 
     # Case A: NEW pipeline — list[dict]
-    page = result[0]
     texts  = page.get("rec_texts", []) or []
     scores = page.get("rec_scores", []) or []
     polys  = page.get("rec_polys", None)  # list of (4,2) arrays
@@ -62,9 +201,12 @@ def ocr(img_bytes: bytes) -> List[Tuple[str, Tuple[float, float, float, float],
         conf = float(scores[i]) if i < len(scores) else 0.0
 
         bbox: Optional[Tuple[float, float, float, float]] = None
+        quad: Optional[np.ndarray] = None
         if polys is not None and i < len(polys):
             poly = np.array(polys[i], dtype=np.float32)  # (4,2)
             bbox = _norm_bbox_from_poly(poly, w, h)
+            if poly.shape == (4, 2):
+                quad = poly / np.array([w, h], dtype=np.float32)
         elif boxes is not None and i < len(boxes):
             box = np.array(boxes[i], dtype=np.float32)   # (4,)
             bbox = _norm_bbox_from_box(box, w, h)
@@ -72,5 +214,10 @@ def ocr(img_bytes: bytes) -> List[Tuple[str, Tuple[float, float, float, float],
         if bbox is None:
             continue
 
-        out.append((text.strip(), bbox, conf))
+        if quad is None:
+            quad = _quad_from_bbox(bbox)
+        # text is left unstripped so character offsets line up with the quad
+        out.append(OcrLine(text, bbox, conf, quad))
     return out
+
+registry.register("ocr", _load, warmup=lambda: ocr(dummy_frame()))
@@ -0,0 +1,115 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# PaddleOCR recognition input: lines scaled to 48 px high, padded to at least 320 wide
+REC_HEIGHT = 48
+REC_MIN_WIDTH = 320
+REC_MAX_WIDTH = 3200
+
+def rec_batch(
+    crops: Sequence[np.ndarray], height: int = REC_HEIGHT, min_width: int = REC_MIN_WIDTH, max_width: int = REC_MAX_WIDTH
+) -> np.ndarray:
+    """
+    BGR line crops to one (N, 3, height, W) float32 batch as PaddleOCR feeds its
+    recognizer: each scaled to `height` keeping its aspect ratio, values in
+    [-1, 1], right-padded with zeros to the widest line (at least `min_width`).
+    """
+    ratios = [c.shape[1] / max(c.shape[0], 1) for c in crops]
+    width = min(max_width, max(min_width, math.ceil(height * max(ratios, default=0.0))))
+    x = np.zeros((len(crops), 3, height, width), dtype=np.float32)
+    for i, (crop, ratio) in enumerate(zip(crops, ratios)):
+        if crop.ndim == 2:
+            crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+        w = min(width, max(1, math.ceil(height * ratio)))
+        line = cv2.resize(crop, (w, height)).astype(np.float32)
+        x[i, :, :, :w] = ((line / 255.0 - 0.5) / 0.5).transpose(2, 0, 1)
+    return x
+
+def load_charset(dict_path: str) -> List[str]:
+    # CTC classes: blank, the dictionary's characters, then the space PaddleOCR appends
+    lines = Path(dict_path).read_text(encoding="utf-8").splitlines()
+    return [""] + [line.rstrip("\r\n") for line in lines] + [" "]
+
+def ctc_decode(probs: np.ndarray, charset: Sequence[str]) -> List[Tuple[str, float]]:
+    """
+    Greedy CTC decoding of (N, T, classes) probabilities: best class per time
+    step, repeats collapsed, blanks dropped. The score is the mean probability
+    of the characters kept.
+    """
+    best = probs.argmax(axis=-1)
+    conf = probs.max(axis=-1)
+    out = []
+    for idx, p in zip(best, conf):
+        keep = idx != 0
+        keep[1:] &= idx[1:] != idx[:-1]
+        text = "".join(charset[i] for i in idx[keep] if i < len(charset))
+        out.append((text, float(p[keep].mean()) if keep.any() else 0.0))
+    return out
+
+class OnnxTextRecognition:
+    """
+    PaddleOCR text-line recognizer exported to ONNX (paddle2onnx), run with
+    ONNX Runtime on the CPU execution provider. `predict` returns what
+    paddleocr.TextRecognition does, so it stands in for it in the split engine.
+
+    The session is created on first use in each process, since ONNX Runtime's
+    thread pools do not survive a fork (see src/serve.py).
+    """
+
+    def __init__(self, path: str, dict_path: str, threads: Optional[int] = None):
+        for p in (path, dict_path):
+            if not Path(p).exists():
+                raise FileNotFoundError(
+                    f"{p} not found; export the recognizer with paddle2onnx "
+                    "(and scripts/quantize_models.py --ocr-rec for int8)"
+                )
+        self.path = path
+        self.charset = load_charset(dict_path)
+        self.threads = threads
+        self._session: Any = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                import onnxruntime as ort
+
+                opts = ort.SessionOptions()
+                opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                if self.threads:
+                    opts.intra_op_num_threads = int(self.threads)
+                self._session = ort.InferenceSession(self.path, opts, providers=["CPUExecutionProvider"])
+                self._pid = os.getpid()
+            return self._session
+
+    def run(self, x: np.ndarray) -> np.ndarray:
+        session = self._get_session()
+        return session.run(None, {session.get_inputs()[0].name: x})[0]
+
+    def predict(self, crops: Sequence[np.ndarray], batch_size: int = 16) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for k in range(0, len(crops), max(1, batch_size)):
+            for text, score in ctc_decode(self.run(rec_batch(crops[k:k + batch_size])), self.charset):
+                out.append({"rec_text": text, "rec_score": score})
+        return out
@@ -12,8 +12,13 @@
 # limitations under the License.
 
 import re
+from functools import lru_cache
+
+import numpy as np
 import phonenumbers
-from typing import List, Tuple, Optional
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple, Optional
+
+from src.core.config import settings
 
 # Compile patterns once
 EMAIL_RE = re.compile(r"\b[a-zA-Z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
@@ -42,59 +47,161 @@ BIC_RE = re.compile(r"\b[A-Z]{6}[A-Z0-9]{2}([A-Z0-9]{3})?\b")
 # License plates 
 LICENSE_PLATE_RE = re.compile(r"\b([A-Z]{1,3}[- ]?\d{1,4}[A-Z]{0,3})\b", re.I)
 
-def classify_ocr_text(s: str) -> Optional[str]:
-    s_clean = s.strip()
-    if not s_clean:
-        return None
-
-    # Email
-    if EMAIL_RE.search(s_clean):
-        return "email"
-
-    # Phone
-    for m in re.finditer(r"[+()0-9\- \.]{7,}", s_clean):
-        cand = m.group(0)
+# Rule precedence, highest first: decides overlaps and the kind classify_ocr_text reports
+RULES: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("email", EMAIL_RE),
+    ("phone", PHONE_RE),
+    ("credit_card", CARD_RE),
+    ("dob", DOB_RE),
+    ("national_id", NATIONAL_ID_RE),
+    ("passport", PASSPORT_RE),
+    ("iban", IBAN_RE),
+    ("bic", BIC_RE),
+    ("license_plate", LICENSE_PLATE_RE),
+    ("address_text", ADDRESS_CUES),
+]
+
+class PiiMatch(NamedTuple):
+    kind: str
+    start: int  # code-point offsets into the scanned string
+    end: int
+
+_NON_DIGIT_RE = re.compile(r"\D")
+# the number as phonenumbers extracts it: from the first digit or "+" to the last digit
+_PHONE_BODY_RE = re.compile(r"[+\d](?:.*\d)?", re.S)
+
+class PhoneValidator:
+    """
+    phonenumbers validation behind a cheap shape check and a bounded LRU memo.
+
+    Candidates are normalized to their digits (plus a leading "+"); anything
+    outside `min_digits`..`max_digits` digits (E.164 allows at most 15, and an
+    international dialling prefix such as 00 or 0011 can precede them) or with
+    a "+" after the first digit is rejected without parsing. Punctuation before
+    the first digit or "+" and after the last digit is ignored, as phonenumbers
+    does. Numbers without "+" are read as national numbers of `default_region`;
+    with None only international numbers validate.
+    """
+
+    def __init__(
+        self,
+        default_region: Optional[str] = None,
+        cache_size: int = 4096,
+        min_digits: int = 7,
+        max_digits: int = 19,
+    ):
+        self.default_region = default_region.upper() if default_region else None
+        self.min_digits = int(min_digits)
+        self.max_digits = int(max_digits)
+        self._is_valid = lru_cache(maxsize=max(1, int(cache_size)))(self._parse_valid)
+
+    def normalize(self, cand: str) -> Optional[str]:
+        digits = _NON_DIGIT_RE.sub("", cand)
+        if not self.min_digits <= len(digits) <= self.max_digits:
+            return None
+        body = _PHONE_BODY_RE.search(cand).group(0)
+        if "+" in body.lstrip("+"):
+            # a "+" anywhere but the leading run makes it no number
+            return None
+        return "+" + digits if body.startswith("+") else digits
+
+    def _parse_valid(self, number: str) -> bool:
         try:
-            n = phonenumbers.parse(cand, None)
-            if phonenumbers.is_valid_number(n):
-                return "phone"
-        except Exception:
-            pass
-
-    # Credit card
-    if CARD_RE.search(s_clean):
-        return "credit_card"
-
-    # DOB
-    if DOB_RE.search(s_clean):
-        return "dob"
-
-    # National ID
-    if NATIONAL_ID_RE.search(s_clean):
-        return "national_id"
-
-    # Passport
-    if PASSPORT_RE.search(s_clean):
-        return "passport"
-
-    # IBAN
-    if IBAN_RE.search(s_clean):
-        return "iban"
-
-    # BIC
-    if BIC_RE.search(s_clean):
-        return "bic"
-
-    # License plate
-    if LICENSE_PLATE_RE.search(s_clean):
-        return "license_plate"
-
-    # Address-ish
-    if ADDRESS_CUES.search(s_clean):
-        return "address_text"
+            return phonenumbers.is_valid_number(phonenumbers.parse(number, self.default_region))
+        except phonenumbers.NumberParseException:
+            return False
+
+    def __call__(self, cand: str) -> bool:
+        number = self.normalize(cand)
+        return number is not None and self._is_valid(number)
+
+    def stats(self) -> Dict[str, Any]:
+        info = self._is_valid.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "entries": info.currsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+
+phone_validator = PhoneValidator(**settings.pii.get("phone", {}))
+
+# which local-format numbers count as phones depends on the region, so
+# results (and the caches keyed on them) are versioned by it too
+PII_RULES_VER = f"pii-regex-1.3+{phone_validator.default_region or 'intl'}"
+
+# Cheap per-line features that rule kinds out before any pattern runs
+_DIGIT_RE = re.compile(r"\d")
+_UPPER_RUN_RE = re.compile(r"[A-Z]{6}")  # BIC, or a national ID without digits
+_NEEDS_DIGIT = {"phone", "credit_card", "dob", "passport", "iban", "license_plate"}
+
+@lru_cache(maxsize=None)
+def _rules(has_at: bool, has_digit: bool, has_upper: bool) -> Tuple[Tuple[str, "re.Pattern[str]"], ...]:
+    return tuple(
+        (k, rx) for k, rx in RULES
+        if (k != "email" or has_at)
+        and (k not in _NEEDS_DIGIT or has_digit)
+        and (k != "national_id" or has_digit or has_upper)
+        and (k != "bic" or has_upper)
+    )
+
+def _rules_for(s: str) -> Tuple[Tuple[str, "re.Pattern[str]"], ...]:
+    return _rules("@" in s, _DIGIT_RE.search(s) is not None, _UPPER_RUN_RE.search(s) is not None)
+
+def _phone_spans(s: str) -> Iterator[Tuple[int, int]]:
+    for m in PHONE_RE.finditer(s):
+        # the candidate class includes separators; report the number itself, without
+        # a ")" that closes nothing or a "(" or "+" that opens nothing
+        cand = m.group(0)
+        start = m.start() + len(cand) - len(cand.lstrip(" .-)"))
+        end = m.start() + len(cand.rstrip(" .-(+"))
+        if end > start and phone_validator(s[start:end]):
+            yield start, end
+
+def find_pii(s: str) -> List[PiiMatch]:
+    """
+    Returns every PII match in `s`, sorted by start offset. Matches never overlap:
+    a candidate overlapping an already accepted match of a higher-priority kind
+    (see RULES) is dropped.
+    """
+    accepted: List[PiiMatch] = []
+    for kind, rx in _rules_for(s):
+        spans = _phone_spans(s) if kind == "phone" else (m.span() for m in rx.finditer(s))
+        for start, end in spans:
+            if any(start < a.end and a.start < end for a in accepted):
+                continue
+            accepted.append(PiiMatch(kind, start, end))
+    accepted.sort(key=lambda m: m.start)
+    return accepted
 
+def classify_ocr_text(s: str) -> Optional[str]:
+    """
+    Returns the highest-priority PII kind found in `s` (see RULES), or None.
+    """
+    s = s.strip()
+    for kind, rx in _rules_for(s):
+        if kind == "phone":
+            if next(_phone_spans(s), None) is not None:
+                return kind
+        elif rx.search(s):
+            return kind
     return None
 
+def to_utf16_spans(s: str, matches: List[PiiMatch]) -> List[Tuple[int, int]]:
+    """
+    Converts code-point spans to UTF-16 code-unit spans (what JS string indices use).
+    Only characters outside the BMP take two units, so ASCII/BMP text maps 1:1.
+    """
+    if not matches:
+        return []
+    if s.isascii() or max(s) <= "\uffff":
+        return [(m.start, m.end) for m in matches]
+    astral = np.frombuffer(s.encode("utf-32-le"), dtype=np.uint32) > 0xFFFF
+    # offset[i] = UTF-16 index of code point i
+    offset = np.arange(len(s) + 1) + np.concatenate(([0], np.cumsum(astral)))
+    return [(int(offset[m.start]), int(offset[m.end])) for m in matches]
+
 def mask_text_for_privacy(kind: str, s: str) -> str:
     if kind == "email":
         return re.sub(r"(^.).*?(@)", r"\1***\2", s)
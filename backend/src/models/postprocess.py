@@ -0,0 +1,43 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Every detector emits boxes as normalized top-left (x, y, w, h), like the OCR stage.
+
+def normalize_detections(det: np.ndarray, width: int, height: int, conf_th: float, num_classes: Optional[int] = None) -> np.ndarray:
+    """
+    (N, 6) x1, y1, x2, y2, conf, cls in pixels -> (M, 6) x, y, w, h, conf, cls
+    with coordinates normalized to 0..1, boxes clipped to the image, and rows
+    below `conf_th`, degenerate after clipping, or (given `num_classes`) of
+    unknown class dropped.
+    """
+    det = np.asarray(det, dtype=np.float32).reshape(-1, 6)
+    scale = np.array([width, height, width, height], dtype=np.float32)
+    xyxy = np.clip(det[:, :4], 0.0, scale) / scale
+    wh = xyxy[:, 2:] - xyxy[:, :2]
+    keep = (det[:, 4] >= conf_th) & (wh > 0).all(axis=1)
+    if num_classes is not None:
+        keep &= (det[:, 5] >= 0) & (det[:, 5] < num_classes)
+    return np.concatenate((xyxy[:, :2], wh, det[:, 4:6]), axis=1)[keep]
+
+def box_tuples(norm: np.ndarray) -> List[Tuple[float, float, float, float, float]]:
+    # [(x, y, w, h, conf)]
+    return list(map(tuple, norm[:, :5].tolist()))
+
+def class_box_tuples(norm: np.ndarray, classes: Sequence[str]) -> List[Tuple[str, float, float, float, float, float]]:
+    # [(class_name, x, y, w, h, conf)]
+    names = np.asarray(classes, dtype=object)[norm[:, 5].astype(np.intp)]
+    return list(zip(names.tolist(), *norm[:, :5].T.tolist()))
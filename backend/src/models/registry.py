@@ -0,0 +1,99 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.models.frame import Frame
+
+def dummy_frame(size: int = 640) -> Frame:
+    # blank frame for warm-up passes; YOLO letterboxes to 640 anyway
+    return Frame(np.zeros((size, size, 3), dtype=np.uint8))
+
+class ModelRegistry:
+    """
+    Models built on first use instead of at import time.
+
+    Each model module registers a loader (which does its own heavy imports)
+    and an optional warm-up call that runs one dummy inference through the
+    real code path. `get()` loads on demand; `warm_up()` loads and exercises
+    a set of models up front, e.g. from the app's startup hook, so the first
+    request does not pay for weight loading, graph building or allocator growth.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmups: Dict[str, Optional[Callable[[], Any]]] = {}
+        self._models: Dict[str, Any] = {}
+        self._status: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[], Any]] = None):
+        self._loaders[name] = loader
+        self._warmups[name] = warmup
+        self._locks[name] = threading.Lock()
+        self._status[name] = "unloaded"
+
+    def get(self, name: str) -> Any:
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            if name not in self._models:
+                self._status[name] = "loading"
+                t0 = time.perf_counter()
+                try:
+                    self._models[name] = self._loaders[name]()
+                except Exception:
+                    self._status[name] = "failed"
+                    raise
+                self._status[name] = "loaded"
+                logger.info(f"model {name} loaded in {time.perf_counter() - t0:.1f}s")
+            return self._models[name]
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> bool:
+        """
+        Loads and warms the given models (default: all registered); returns
+        whether all of them are ready. Failures are logged, not raised.
+        """
+        ok = True
+        for name in list(names if names is not None else self._loaders):
+            if name not in self._loaders:
+                logger.warning(f"warm-up: unknown model {name!r}")
+                ok = False
+                continue
+            try:
+                self.get(name)
+                warmup = self._warmups[name]
+                if warmup is not None:
+                    t0 = time.perf_counter()
+                    warmup()
+                    logger.info(f"model {name} warmed up in {time.perf_counter() - t0:.1f}s")
+                self._status[name] = "ready"
+            except Exception:
+                logger.exception(f"warm-up of model {name} failed")
+                self._status[name] = "failed"
+                ok = False
+        return ok
+
+    def status(self) -> Dict[str, str]:
+        return dict(self._status)
+
+    def is_ready(self, names: Iterable[str]) -> bool:
+        return all(self._status.get(name) == "ready" for name in names)
+
+registry = ModelRegistry()
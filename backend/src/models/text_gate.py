@@ -0,0 +1,146 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from src.core.config import settings
+
+def _glyph_boxes(gray: np.ndarray) -> List[np.ndarray]:
+    # Connected components of pixels clearly darker (then lighter) than their
+    # neighbourhood, so both dark-on-light and light-on-dark print is found;
+    # one (N, 4) x, y, w, h array per polarity.
+    h, w = gray.shape
+    local = cv2.blur(gray, (15, 15)).astype(np.int16)
+    g = gray.astype(np.int16)
+    out = []
+    for mask in (g < local - 12, g > local + 12):
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=8)
+        stats = stats[1:].astype(np.float32)  # row 0 is the background
+        bw, bh, area = stats[:, 2], stats[:, 3], stats[:, 4]
+        fill = area / np.maximum(bw * bh, 1)
+        glyph = (
+            (bh >= 5) & (bh <= h / 4)
+            & (bw <= 2.0 * bh) & (bw >= 1)
+            & (fill > 0.1) & (fill < 0.95)
+        )
+        out.append(stats[glyph, :4])
+    return out
+
+# blobs compared pairwise at once; bounds the (n, n) step below
+_CHUNK = 600
+
+def _chained(boxes: np.ndarray) -> int:
+    if len(boxes) < 3:
+        return 0
+    x, y, bw, bh = boxes.T
+    bottom = y + bh
+    hr = bh[:, None] / bh[None, :]
+    gap = np.maximum(x[None, :] - (x + bw)[:, None], x[:, None] - (x + bw)[None, :])
+    neighbour = (
+        (hr > 0.75) & (hr < 1.33)
+        & (np.abs(bottom[:, None] - bottom[None, :]) < 0.15 * bh[:, None])
+        & (gap > -0.3 * bh[:, None]) & (gap < 0.8 * bh[:, None])
+    )
+    np.fill_diagonal(neighbour, False)
+    inner = neighbour.sum(axis=1) >= 2
+    return int((inner | neighbour[:, inner].any(axis=1)).sum())
+
+def text_score(image: np.ndarray, max_side: Optional[int] = 320, enough: Optional[int] = None) -> int:
+    """
+    Number of character-like blobs that sit in a run of at least three on one
+    line: a cheap proxy for "this image has text".
+
+    Runs on a grey copy whose longer side is at most `max_side` (None: as
+    given). A blob of locally dark (or light) pixels counts as a glyph
+    candidate by size, aspect and fill; it must be at least 5 px tall, so
+    print smaller than that at this size is not seen. Two candidates are
+    neighbours when they have comparable heights, share a baseline and are at
+    most a glyph height apart; a blob counts when it has two neighbours or is
+    next to one that does. Letters in a word line up like that; foliage, hair
+    or fabric texture rarely does.
+
+    Candidates are compared in chunks of lines (sorted by baseline), so a full
+    page costs linear time; counting stops once it reaches `enough`.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    r = max_side / max(h, w) if max_side else 1.0
+    if r < 1:
+        gray = cv2.resize(gray, (max(1, int(w * r)), max(1, int(h * r))), interpolation=cv2.INTER_AREA)
+
+    score = 0
+    for boxes in _glyph_boxes(gray):
+        order = np.lexsort((boxes[:, 0], boxes[:, 1] + boxes[:, 3]))
+        for k in range(0, len(order), _CHUNK):
+            score += _chained(boxes[order[k:k + _CHUNK]])
+            if enough is not None and score >= enough:
+                return score
+    return score
+
+class TextGate:
+    """
+    Decides before OCR whether an image is worth reading: an image whose
+    text_score stays below `min_score` skips PaddleOCR. Counts its decisions
+    for /metrics.
+
+    Meant for the copy OCR itself reads: print OCR can make out is at least
+    a few pixels tall there, so the glyph floor does not hide it. A thumbnail
+    of `coarse_side` is scored first, cheaply catching large print (signs,
+    headings) whose strokes are too thick for the full-size pass.
+    """
+
+    def __init__(self, coarse_side: int = 320, min_score: int = 4):
+        self.coarse_side = int(coarse_side)
+        self.min_score = int(min_score)
+        self.version = f"cc2-{self.coarse_side}-{self.min_score}"
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped = 0
+        self.total_ms = 0.0
+
+    def score(self, image: np.ndarray, enough: Optional[int] = None) -> int:
+        coarse = text_score(image, self.coarse_side, enough)
+        if enough is not None and coarse >= enough:
+            return coarse
+        return max(coarse, text_score(image, None, enough))
+
+    def __call__(self, image: np.ndarray) -> bool:
+        t0 = time.perf_counter()
+        run_ocr = self.score(image, self.min_score) >= self.min_score
+        with self._lock:
+            self.checked += 1
+            self.skipped += not run_ocr
+            self.total_ms += (time.perf_counter() - t0) * 1000.0
+        return run_ocr
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "skipped": self.skipped,
+                "skip_rate": self.skipped / self.checked if self.checked else 0.0,
+                "mean_ms": self.total_ms / self.checked if self.checked else 0.0,
+            }
+
+def _from_settings() -> Optional[TextGate]:
+    cfg = dict(settings.text_gate)
+    if not cfg.pop("enabled", False):
+        return None
+    return TextGate(**cfg)
+
+text_gate = _from_settings()
@@ -0,0 +1,178 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from src.core.config import settings
+
+# Opset and input size the exported graphs are built with (scripts/download_models.py)
+ONNX_OPSET = 17
+ONNX_IMGSZ = 640
+
+# Precision variants of an exported graph; int8 ones come from scripts/quantize_models.py
+ONNX_VARIANTS = {"fp32": ".onnx", "int8": ".int8.onnx"}
+
+def onnx_path(pt_path: str, variant: str = "fp32") -> str:
+    if variant not in ONNX_VARIANTS:
+        raise ValueError(f"Unknown model variant {variant!r}")
+    return str(Path(pt_path).with_suffix(ONNX_VARIANTS[variant]))
+
+def letterbox(image: np.ndarray, size: int = ONNX_IMGSZ) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Scales a BGR image to fit `size` x `size` and pads it centrally with grey
+    (114), as Ultralytics does. Returns the padded image, the scale and the (x, y) padding.
+    """
+    h, w = image.shape[:2]
+    r = min(size / h, size / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    if (nw, nh) != (w, h):
+        image = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    px, py = (size - nw) / 2, (size - nh) / 2
+    top, left = int(round(py - 0.1)), int(round(px - 0.1))
+    out = cv2.copyMakeBorder(
+        image, top, size - nh - top, left, size - nw - left, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+    return out, r, (left, top)
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_th: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression over (N, 4) xyxy boxes; returns kept indices, best first.
+    """
+    order = np.argsort(-scores, kind="stable")
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep: List[int] = []
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_th]
+    return np.asarray(keep, dtype=np.intp)
+
+def postprocess(
+    pred: np.ndarray, conf: float, iou: float, max_det: int, scale: float, pad: Tuple[float, float], shape: Tuple[int, int]
+) -> np.ndarray:
+    """
+    One image's raw YOLOv8 output, (4 + classes, anchors) of cx, cy, w, h and
+    class scores, to (N, 6) x1, y1, x2, y2, conf, cls in original pixels.
+    """
+    pred = pred.T
+    cls = pred[:, 4:].argmax(axis=1)
+    score = pred[np.arange(len(pred)), 4 + cls]
+    mask = score >= conf
+    pred, cls, score = pred[mask], cls[mask], score[mask]
+    if not len(pred):
+        return np.zeros((0, 6), dtype=np.float32)
+    xy, wh = pred[:, :2], pred[:, 2:4] / 2
+    boxes = np.concatenate((xy - wh, xy + wh), axis=1)
+    # per-class NMS in one pass: shift each class into its own coordinate range
+    keep = nms(boxes + cls[:, None] * 7680.0, score, iou)[:max_det]
+    boxes = (boxes[keep] - np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)) / scale
+    h, w = shape
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+    return np.concatenate((boxes, score[keep, None], cls[keep, None]), axis=1).astype(np.float32)
+
+class YoloOnnx:
+    """
+    YOLOv8 detector exported to ONNX, run with ONNX Runtime on the CPU
+    execution provider: letterbox, one batched session run, NumPy NMS.
+
+    The session is created on first use in each process, since ONNX Runtime's
+    thread pools do not survive a fork (see src/serve.py).
+    """
+
+    def __init__(self, path: str, imgsz: int = ONNX_IMGSZ, iou: float = 0.7, max_det: int = 300, threads: Optional[int] = None):
+        if not Path(path).exists():
+            raise FileNotFoundError(
+                f"{path} not found; run scripts/download_models.py --export-onnx "
+                "(and scripts/quantize_models.py for int8)"
+            )
+        self.path = path
+        self.imgsz = int(imgsz)
+        self.iou = float(iou)
+        self.max_det = int(max_det)
+        self.threads = threads
+        self._session: Any = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                import onnxruntime as ort
+
+                opts = ort.SessionOptions()
+                opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                if self.threads:
+                    opts.intra_op_num_threads = int(self.threads)
+                self._session = ort.InferenceSession(self.path, opts, providers=["CPUExecutionProvider"])
+                self._pid = os.getpid()
+            return self._session
+
+    def predict(self, images: Sequence[np.ndarray], conf: float = 0.25) -> List[np.ndarray]:
+        """
+        BGR images in, per image (N, 6) x1, y1, x2, y2, conf, cls in its own pixels out.
+        """
+        session = self._get_session()
+        batch, metas = [], []
+        for image in images:
+            padded, scale, pad = letterbox(image, self.imgsz)
+            batch.append(padded[:, :, ::-1].transpose(2, 0, 1))  # BGR HWC -> RGB CHW
+            metas.append((scale, pad, image.shape[:2]))
+        x = np.ascontiguousarray(np.stack(batch), dtype=np.float32) / 255.0
+        (out,) = session.run(None, {session.get_inputs()[0].name: x})
+        return [postprocess(p, conf, self.iou, self.max_det, *meta) for p, meta in zip(out, metas)]
+
+def yolo_predict(model: Any, images: Sequence[np.ndarray], conf: float) -> List[np.ndarray]:
+    """
+    Runs either backend (YoloOnnx or an Ultralytics YOLO) and returns per image
+    (N, 6) x1, y1, x2, y2, conf, cls arrays in that image's pixels.
+    """
+    if isinstance(model, YoloOnnx):
+        return model.predict(images, conf=conf)
+    results = list(model.predict(source=list(images), conf=conf, verbose=False) or [])
+    out = []
+    for r in results:
+        if r is None or r.boxes is None:
+            out.append(np.zeros((0, 6), dtype=np.float32))
+        else:
+            out.append(r.boxes.data.cpu().numpy().astype(np.float32))
+    out += [np.zeros((0, 6), dtype=np.float32)] * (len(images) - len(out))
+    return out
+
+def load_yolo(pt_path: str) -> Any:
+    """
+    Loads a YOLO model with the backend chosen by `models.yolo_backend`:
+    "torch" (Ultralytics) or "onnx" (the exported graph next to the .pt, in
+    the precision picked by `models.variant`).
+    """
+    backend = settings.models.get("yolo_backend", "torch")
+    if backend == "onnx":
+        variant = settings.models.get("variant", "fp32")
+        return YoloOnnx(onnx_path(pt_path, variant), threads=settings.models.get("onnx_threads"))
+    if backend != "torch":
+        raise ValueError(f"Unknown models.yolo_backend {backend!r}")
+    from ultralytics import YOLO
+    return YOLO(pt_path)
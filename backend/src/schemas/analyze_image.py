@@ -12,7 +12,7 @@
 # limitations under the License.
 
 from pydantic import BaseModel
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from .common import ImageFinding
 
 
@@ -23,3 +23,12 @@ class AnalyzeImageResponse(BaseModel):
     coordSpace: str = "normalized"
     degraded: bool = False
     warnings: list = []
+    stageTimingsMs: Dict[str, float] = {}  # wall time per pipeline stage
+
+
+class AnalyzeImageBatchItem(BaseModel):
+    # one NDJSON line of POST /analyze/images; exactly one of result/error is set
+    index: int
+    filename: Optional[str] = None
+    result: Optional[AnalyzeImageResponse] = None
+    error: Optional[str] = None
@@ -11,7 +11,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from .common import TextFinding
 
@@ -25,3 +25,14 @@ class AnalyzeTextResponse(BaseModel):
     riskScore: int
     degraded: bool = False
     warnings: list = []
+
+class AnalyzeTextBatchRequest(BaseModel):
+    # rule matches do not depend on a language or a policy (they carry conf
+    # 1.0, above every threshold), so such fields are refused with 422
+    # rather than accepted and ignored
+    model_config = ConfigDict(extra="forbid")
+
+    texts: List[str]
+
+class AnalyzeTextBatchResponse(BaseModel):
+    results: List[AnalyzeTextResponse]  # same order as the request texts
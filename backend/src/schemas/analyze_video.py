@@ -0,0 +1,28 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pydantic import BaseModel
+from typing import List
+from .common import ImageFinding
+
+
+class VideoFrameResult(BaseModel):
+    # one NDJSON line of POST /analyze/video, or one message of /analyze/stream
+    index: int
+    timestampMs: float
+    keyframe: bool  # findings come from the full pipeline; otherwise tracked from the last keyframe
+    findings: List[ImageFinding]
+    riskScore: int
+    runningRiskScore: int  # every kind seen so far, at its highest count in any frame
+    fps: float  # frames processed per second of wall time so far
+    degraded: bool = False
@@ -14,7 +14,18 @@
 from pydantic import BaseModel, Field
 from typing import Literal, Tuple, Optional
 
-KindText = Literal["email", "phone", "national_id", "address_text"]
+KindText = Literal[
+    "email",
+    "phone",
+    "national_id",
+    "address_text",
+    "credit_card",
+    "dob",
+    "passport",
+    "iban",
+    "bic",
+    "license_plate",
+]
 KindImage = Literal[
     "face",
     "license_plate",
@@ -30,6 +41,18 @@ KindImage = Literal[
     "passport",
     "iban",
     "bic",
+    # scene elements (landmarks model):
+    "person",
+    "rider",
+    "car",
+    "truck",
+    "bus",
+    "train",
+    "motorcycle",
+    "bicycle",
+    "traffic light",
+    "traffic sign",
+    "building",
 ]
 
 class TextFinding(BaseModel):
@@ -0,0 +1,163 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Prefork server: the models load once in this (parent) process, then
+`serving.workers` children are forked onto one shared listening socket.
+Weights are only ever read, so the children share their pages copy-on-write
+instead of each loading PaddleOCR and both YOLO models again.
+
+Without `serving.workers` (or --workers) the count follows the CPUs this
+process may run on (affinity mask and cgroup quota), lowered so that the
+cgroup memory limit holds the parent plus `serving.worker_mb` per worker.
+
+    PYTHONPATH=. python -m src.serve [--workers N] [--host H] [--port P]
+"""
+
+import argparse
+import gc
+import math
+import os
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.core.config import settings
+
+def _limit_threads(n: int):
+    # Must happen before torch/Paddle are imported: N workers each running an
+    # all-cores OpenMP pool would oversubscribe the box N times over.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(var, str(n))
+
+_CGROUP = Path("/sys/fs/cgroup")
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+def _cgroup_cpus() -> Optional[float]:
+    # cgroup v2 "cpu.max" is "<quota> <period>" or "max <period>"; v1 splits them
+    quota, _, period = (_read(_CGROUP / "cpu.max") or "").partition(" ")
+    if not period:
+        quota = _read(_CGROUP / "cpu" / "cpu.cfs_quota_us") or "-1"
+        period = _read(_CGROUP / "cpu" / "cpu.cfs_period_us") or "0"
+    if quota in ("max", "-1") or not int(period):
+        return None
+    return int(quota) / int(period)
+
+def _cgroup_memory_mb() -> Optional[float]:
+    limit = _read(_CGROUP / "memory.max") or _read(_CGROUP / "memory" / "memory.limit_in_bytes")
+    if limit is None or limit == "max" or int(limit) >= 1 << 60:  # v1 reports "no limit" as ~2^63
+        return None
+    return int(limit) / (1024 * 1024)
+
+def _default_workers(parent_mb: float, worker_mb: float) -> int:
+    # os.cpu_count() is the host's count, not what a container or taskset allows
+    n = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    cpus = _cgroup_cpus()
+    if cpus is not None:
+        n = min(n, math.ceil(cpus))
+    memory_mb = _cgroup_memory_mb()
+    if memory_mb is not None and worker_mb > 0:
+        n = min(n, int((memory_mb - parent_mb) // worker_mb))
+    return max(1, n)
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _spawn(sock: socket.socket, app) -> int:
+    import uvicorn
+
+    pid = os.fork()
+    if pid:
+        return pid
+    # worker: uvicorn installs its own SIGINT/SIGTERM handlers for a graceful stop
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    code = 0
+    try:
+        uvicorn.Server(uvicorn.Config(app, lifespan="on")).run(sockets=[sock])
+    except BaseException:
+        code = 1
+    finally:
+        os._exit(code)
+
+def main():
+    cfg = settings.serving
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=cfg.get("workers"))
+    ap.add_argument("--host", default=cfg.get("host", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=cfg.get("port", 8080))
+    args = ap.parse_args()
+
+    _limit_threads(int(cfg.get("threads_per_worker", 1)))
+
+    from loguru import logger
+
+    from src.core.procmem import process_memory
+    from src.main import app
+    from src.models.registry import registry
+
+    sock = _bind(args.host, args.port, int(cfg.get("backlog", 2048)))
+
+    # Load but do not run the models here: inference starts thread pools, and
+    # threads do not survive fork. Each worker warms up in its own lifespan.
+    for name in settings.models.get("warmup", []):
+        registry.get(name)
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in the workers do not write to (and un-share) these pages.
+    gc.collect()
+    gc.freeze()
+    memory = process_memory()
+    workers = args.workers or _default_workers(memory.get("rss_mb", 0.0), float(cfg.get("worker_mb", 0)))
+    logger.info(f"parent {os.getpid()}: models loaded, {memory}; forking {workers} workers")
+
+    children = {_spawn(sock, app) for _ in range(max(1, workers))}
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning(f"worker {pid} exited with status {status}; restarting")
+            time.sleep(1.0)  # no hot loop if workers die at startup
+            children.add(_spawn(sock, app))
+    sock.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import tarfile
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+from typing import AsyncIterator, BinaryIO, Iterator, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+from src.core.config import settings
+from src.models.frame import ImageDecodeError, ImageTooLargeError
+from src.schemas.analyze_image import AnalyzeImageBatchItem
+from src.services.image_pipeline import analyze_image
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+ZIP_TYPES = {"application/zip", "application/x-zip-compressed"}
+TAR_TYPES = {"application/x-tar", "application/gzip", "application/x-gzip", "application/x-gtar"}
+
+def _is_image_name(name: str) -> bool:
+    return PurePosixPath(name).suffix.lower() in IMAGE_SUFFIXES
+
+class ArchiveError(ValueError):
+    pass
+
+# What the archive readers yield per item: the image bytes, or why they could
+# not be read; errors become error records in the stream instead of ending it.
+Upload = Tuple[Optional[str], Union[bytes, ArchiveError]]
+
+# corrupt data surfaces as any of these, depending on where the stream breaks
+_CORRUPT = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError)
+
+def _max_member_bytes() -> int:
+    return int(settings.batch_api.get("max_member_mb", 50)) << 20
+
+def iter_zip_images(fileobj: BinaryIO, name: Optional[str] = None, max_bytes: Optional[int] = None) -> Iterator[Upload]:
+    """
+    Image members of a zip archive. A member whose declared or actual size is
+    above `max_bytes` is reported, not read, so a zip bomb cannot exhaust memory.
+    """
+    limit = max_bytes or _max_member_bytes()
+    try:
+        with zipfile.ZipFile(fileobj) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not _is_image_name(info.filename):
+                    continue
+                if info.file_size > limit:
+                    yield info.filename, ArchiveError(f"Archive member is larger than {limit >> 20} MB")
+                    continue
+                try:
+                    # the header's size can lie; never read past the limit
+                    with zf.open(info) as f:
+                        data = f.read(limit + 1)
+                except _CORRUPT as e:
+                    yield info.filename, ArchiveError(f"Corrupt archive member: {e}")
+                    continue
+                if len(data) > limit:
+                    yield info.filename, ArchiveError(f"Archive member is larger than {limit >> 20} MB")
+                    continue
+                yield info.filename, data
+    except _CORRUPT as e:
+        yield name, ArchiveError(f"Corrupt zip archive: {e}")
+
+def iter_tar_images(fileobj: BinaryIO, name: Optional[str] = None, max_bytes: Optional[int] = None) -> Iterator[Upload]:
+    """
+    Image members of a (compressed) tar archive, with the same member size
+    limit as iter_zip_images. A stream that breaks off ends with an error item.
+    """
+    limit = max_bytes or _max_member_bytes()
+    try:
+        # "r|*" reads members strictly in order, so the archive is never held in memory
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+            for member in tf:
+                if not member.isfile() or not _is_image_name(member.name):
+                    continue
+                if member.size > limit:
+                    yield member.name, ArchiveError(f"Archive member is larger than {limit >> 20} MB")
+                    continue
+                f = tf.extractfile(member)
+                if f is not None:
+                    yield member.name, f.read()
+    except _CORRUPT as e:
+        yield name, ArchiveError(f"Corrupt tar archive: {e}")
+
+async def _analyze_one(
+    index: int, filename: Optional[str], img_bytes: Union[bytes, ArchiveError], modes: str | None, policy: str | None
+) -> AnalyzeImageBatchItem:
+    if isinstance(img_bytes, ArchiveError):
+        return AnalyzeImageBatchItem(index=index, filename=filename, error=str(img_bytes))
+    try:
+        # Bulk work waits for an executor slot instead of bouncing with 503
+        result = await analyze_image(img_bytes, modes=modes, policy=policy, wait=True)
+    except (ImageDecodeError, ImageTooLargeError) as e:
+        return AnalyzeImageBatchItem(index=index, filename=filename, error=str(e))
+    except Exception:
+        logger.exception(f"batch item {index} ({filename}) failed")
+        return AnalyzeImageBatchItem(index=index, filename=filename, error="Analysis failed")
+    return AnalyzeImageBatchItem(index=index, filename=filename, result=result)
+
+async def analyze_images(
+    items: AsyncIterator[Upload],
+    modes: str | None,
+    policy: str | None,
+    max_in_flight: Optional[int] = None,
+) -> AsyncIterator[AnalyzeImageBatchItem]:
+    """
+    Runs every (filename, bytes) item through analyze_image and yields results in completion order.
+
+    At most `max_in_flight` images are read and analyzed at once, so memory stays
+    bounded however many images the request carries. Concurrent images share the
+    YOLO micro-batches like independent requests would.
+    """
+    limit = max(1, int(max_in_flight or settings.batch_api.get("max_in_flight", 16)))
+    pending: Set[asyncio.Task] = set()
+    index = 0
+    try:
+        async for filename, img_bytes in items:
+            pending.add(asyncio.create_task(_analyze_one(index, filename, img_bytes, modes, policy)))
+            index += 1
+            if len(pending) >= limit:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # client went away mid-stream
+        for task in pending:
+            task.cancel()
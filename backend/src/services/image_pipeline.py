@@ -11,47 +11,290 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Dict
+import asyncio
+import json
+import time
+from typing import Any, List, Dict, Optional, Tuple
+
+import numpy as np
+
 from src.schemas.common import ImageFinding
 from src.schemas.analyze_image import AnalyzeImageResponse
+from src.models.frame import Frame, decode_frame
 from src.models.ocr import ocr
+from src.models.text_gate import text_gate
 from src.models.faces import faces
 from src.models.landmarks import landmarks
-from src.models.pii_from_text import classify_ocr_text, mask_text_for_privacy
+from src.models.pii_from_text import PII_RULES_VER, find_pii, mask_text_for_privacy
 from src.services.risk_scoring import score
+from src.services.span_boxes import span_boxes
+from src.services.ocr_cascade import ocr_cascade
+from src.services.tiling import tiler
+from src.services.inference_executor import inference_executor
+from src.services.stage_scheduler import run_stages
+from src.services.result_cache import result_cache
+from src.services.phash_index import dhash, phash_index
+from src.core.config import settings
 from src.services.utils_warnings import warning_for_kind
 
-MODEL_VER = {"ocr": "paddleocr-2.7", "pii_rules": "pii-regex-1.0", "face": "YOLOv8"}
+# the ONNX graphs agree with PyTorch only to float tolerance (INT8 ones less
+# closely still), so results are versioned apart
+_YOLO_SUFFIX = (
+    f"-onnx-{settings.models.get('variant', 'fp32')}" if settings.models.get("yolo_backend") == "onnx" else ""
+)
+
+# The split engine skips PaddleOCR's document unwarping and pads lines in
+# shared batches, and an ONNX recognizer (FP32 or INT8) reads them differently
+# again, so each combination is versioned apart
+_OCR_SUFFIX = ""
+if settings.ocr.get("engine") == "split":
+    _OCR_SUFFIX = "-split"
+    if settings.ocr.get("rec_onnx"):
+        _OCR_SUFFIX += f"-rec-onnx-{settings.models.get('variant', 'fp32')}"
+
+MODEL_VER = {
+    "ocr": "paddleocr-2.7" + _OCR_SUFFIX,
+    "pii_rules": PII_RULES_VER,
+    "face": "YOLOv8" + _YOLO_SUFFIX,
+    "landmarks": "YOLOv8-landmarks-0.2" + _YOLO_SUFFIX,
+    # a skipped OCR pass yields no text findings, so gate settings are part of the result
+    "text_gate": text_gate.version if text_gate is not None else "off",
+    "ocr_cascade": ocr_cascade.version if ocr_cascade is not None else "off",
+    "tiling": tiler.version if tiler is not None else "off",
+}
+
+# Detector stages, in the order their findings are merged
+STAGES = ("ocr", "face", "landmarks")
+# stages whose raw detections a near-duplicate image may reuse; never OCR,
+# whose text differs between images of one template
+NEAR_DUPLICATE_STAGES = ("face", "landmarks")
+
+def _read_text(frame, ocr_side) -> list:
+    # fine print on a frame this large is invisible even at the OCR size
+    if _tiled("ocr", frame, ocr_side):
+        return tiler.lines(frame, lambda tile: ocr(tile.resized(ocr_side)))
+    # the gate looks at the copy OCR reads: on a smaller one, ordinary print
+    # of a page or screenshot shrinks below its glyph floor
+    page = frame.resized(ocr_side)
+    if text_gate is not None and not text_gate(page.image):
+        return []
+    return ocr(page)
+
+def _tiled(stage: str, frame, side) -> bool:
+    return tiler is not None and tiler.applies(stage, frame, side)
+
+def _detect(stage: str, fn, frame, side) -> list:
+    # fn(frame) runs the detector on one frame at the stage's working size
+    if _tiled(stage, frame, side):
+        return tiler.detections(stage, frame, fn)
+    return fn(frame)
+
+class InvalidOptionError(ValueError):
+    pass
+
+def parse_modes(modes: str | None) -> Tuple[str, ...]:
+    """
+    Turns the `modes` form field ("face", "ocr,landmarks", ...) into the stages to run.
+    Empty means all of them; unknown names raise InvalidOptionError.
+    """
+    requested = {m.strip().lower() for m in (modes or "").replace(" ", ",").split(",") if m.strip()}
+    if not requested:
+        return STAGES
+    unknown = requested - set(STAGES)
+    if unknown:
+        raise InvalidOptionError(f"Unknown mode(s): {', '.join(sorted(unknown))}; expected any of {', '.join(STAGES)}")
+    return tuple(s for s in STAGES if s in requested)
+
+def resolve_policy(policy: str | None) -> str:
+    """
+    Returns the policy name whose `conf_thresholds` apply; defaults to `policy_mode`.
+    """
+    name = (policy or settings.policy_mode).strip().lower()
+    if name not in settings.conf_thresholds:
+        raise InvalidOptionError(f"Unknown policy: {name}; expected any of {', '.join(settings.conf_thresholds)}")
+    return name
+
+def _cache_context(stages: Tuple[str, ...], policy: str) -> Dict[str, Any]:
+    # everything besides the pixels that changes a result: the resolved
+    # settings, not just their names, so an edited config misses the disk tier
+    return {
+        "models": MODEL_VER,
+        "modes": list(stages),
+        "policy": policy,
+        "thresholds": settings.conf_thresholds[policy],
+        "sides": [settings.preprocess.get("yolo_max_side"), settings.preprocess.get("ocr_max_side")],
+        "max_image_mp": settings.max_image_mp,
+        "weights": settings.weights,
+    }
+
+def _cache_lookup(img_bytes: bytes, stages: Tuple[str, ...], policy: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    key = result_cache.make_key(img_bytes, _cache_context(stages, policy))
+    return key, result_cache.get(key)
+
+async def analyze_image(img_bytes: bytes, modes: str | None, policy: str | None, wait: bool = False) -> AnalyzeImageResponse:
+    response, _ = await analyze_image_frame(img_bytes, modes, policy, wait=wait, need_frame=False)
+    return response
 
-async def analyze_image(img_bytes: bytes, modes: str | None, policy: str | None) -> AnalyzeImageResponse:
+async def analyze_image_frame(
+    img_bytes: bytes, modes: str | None, policy: str | None, wait: bool = False, need_frame: bool = True
+) -> Tuple[AnalyzeImageResponse, Optional[Frame]]:
+    """
+    analyze_image that also hands back the decoded frame the detectors read,
+    for callers that render on it. A cached result has no frame, so with
+    `need_frame` the image is decoded after all on a cache hit.
+    """
+    # Raises InvalidOptionError for unknown modes/policies (mapped to 400 by the router)
+    stages = parse_modes(modes)
+    policy = resolve_policy(policy)
+
+    # Repeated uploads are answered from the result cache without touching the models
+    cache_key = None
+    if result_cache is not None:
+        cache_key, cached = await asyncio.to_thread(_cache_lookup, img_bytes, stages, policy)
+        if cached is not None:
+            frame = await inference_executor.run(
+                decode_frame, img_bytes, max_mp=settings.max_image_mp, reject_mp=settings.reject_image_mp
+            ) if need_frame else None
+            return AnalyzeImageResponse.model_validate(cached), frame
+
+    # Raises InferenceQueueFull when the executor is saturated (mapped to 503 in main),
+    # unless `wait` asks to queue for a slot instead
+    async with inference_executor.admit(wait=wait):
+        response, frame = await _analyze(img_bytes, stages, policy)
+
+    # degraded results are incomplete; let the next attempt recompute them
+    if cache_key is not None and not response.degraded:
+        await asyncio.to_thread(result_cache.put, cache_key, response.model_dump(mode="json"))
+    return response, frame
+
+async def _analyze(img_bytes: bytes, selected: Tuple[str, ...], policy: str) -> Tuple[AnalyzeImageResponse, Frame]:
+    # 0) Decode once; every detector below reads the same frame.
+    #    Decoding and inference block, so both run on the inference executor.
+    t0 = time.perf_counter()
+    frame = await inference_executor.run(
+        decode_frame, img_bytes, max_mp=settings.max_image_mp, reject_mp=settings.reject_image_mp
+    )
+    timings = {"decode": (time.perf_counter() - t0) * 1000.0}
+    return await analyze_frame(frame, selected, policy, timings=timings), frame
+
+async def analyze_frame(
+    frame: Frame,
+    selected: Tuple[str, ...],
+    policy: str,
+    timings: Optional[Dict[str, float]] = None,
+    near_duplicates: bool = True,
+) -> AnalyzeImageResponse:
+    """
+    Runs the selected detector stages on an already decoded frame and merges
+    their findings. `near_duplicates=False` neither consults nor feeds the
+    dHash index, for callers like video whose frames are near-duplicates of
+    each other by nature. Admission control is up to the caller.
+    """
     findings: List[ImageFinding] = []
     warnings: List[str] = []
     kind_counts: Dict[str, int] = {}
+    timings = {} if timings is None else timings
+    thresholds: Dict[str, float] = settings.conf_thresholds[policy]
+    image_shape = frame.source_shape or frame.shape
+    yolo_side = settings.preprocess.get("yolo_max_side")
+    ocr_side = settings.preprocess.get("ocr_max_side")
+
+    # 0b) A resized or re-encoded copy of an image we already analyzed reuses
+    #     its face/landmark detections: boxes are normalized, so they transfer
+    #     directly. OCR always runs again: a 64-bit dHash cannot tell apart two
+    #     IDs, receipts or screenshots that share a layout but not their text.
+    phash: Optional[int] = None
+    reused: Dict[str, list] = {}
+    reusable = tuple(name for name in selected if name in NEAR_DUPLICATE_STAGES)
+    if phash_index is not None and near_duplicates and reusable:
+        context = json.dumps(_cache_context(reusable, policy), sort_keys=True)
+        aspect = frame.width / frame.height
+        # hashed from the YOLO-sized copy, which the detectors reuse on a miss
+        phash = await inference_executor.run(lambda: dhash(frame.resized(yolo_side).image))
+        reused = phash_index.lookup(phash, aspect, context) or {}
 
-    # 1) OCR to extract text blocks + coords
-    ocr_lines = ocr(img_bytes)
+    # 1) Detectors are independent: fan the selected ones out in parallel, each
+    #    under its timeouts_ms budget, then merge their findings below in STAGES order.
+    #    Each sees the frame at its own working resolution (resized on its worker);
+    #    boxes come back normalized, so no remapping is needed. Images far
+    #    larger than a stage's working size are tiled for it (see tiling).
+    stage_fns = {
+        "ocr": lambda: _read_text(frame, ocr_side),
+        "face": lambda: _detect(
+            "face", lambda f: faces(f.resized(yolo_side), conf_th=thresholds.get("face", 0.5)), frame, yolo_side
+        ),
+        "landmarks": lambda: _detect(
+            "landmarks", lambda f: landmarks(f.resized(yolo_side), conf_th=thresholds.get("landmarks", 0.25)), frame, yolo_side
+        ),
+    }
+    # In cascade mode OCR waits for the landmarks and reads the text-bearing
+    # regions they found. Not on frames tiled for OCR: crops of the OCR-sized
+    # copy would lose the fine print tiling is there to keep.
+    after: Dict[str, str] = {}
+    if ocr_cascade is not None and "ocr" in selected and "landmarks" in selected and not _tiled("ocr", frame, ocr_side):
+        if "landmarks" in reused:
+            stage_fns["ocr"] = lambda: ocr_cascade(frame.resized(ocr_side), reused["landmarks"])
+        else:
+            stage_fns["ocr"] = lambda detections: ocr_cascade(frame.resized(ocr_side), detections)
+            after["ocr"] = "landmarks"
+    # a tiled stage makes several model passes, `tiling.workers` at a time
+    timeouts_ms = dict(settings.timeouts_ms)
+    for name, side in (("ocr", ocr_side), ("face", yolo_side), ("landmarks", yolo_side)):
+        if name in timeouts_ms and _tiled(name, frame, side):
+            timeouts_ms[name] *= tiler.rounds(name, frame)
+    stages = await run_stages(
+        {name: stage_fns[name] for name in selected if name not in reused},
+        timeouts_ms=timeouts_ms,
+        after=after,
+    )
+    skipped: List[str] = []
+    for name, res in stages.items():
+        timings[name] = res.elapsed_ms
+        if res.timed_out:
+            skipped.append(name)
+            warnings.append(f"{name} stage skipped: exceeded {timeouts_ms[name]:g} ms budget")
 
-    # 2) Classify each OCR line as PII (email/phone/credit_card/address_text)
-    for raw_text, (x, y, w, h), conf in ocr_lines:
-        kind = classify_ocr_text(raw_text)
-        if not kind:
-            continue
+    def _value(name: str) -> list:
+        # empty for stages that were not selected or ran out of time
+        if name in reused:
+            return reused[name]
+        res = stages.get(name)
+        return (res.value if res is not None else None) or []
 
-        masked = mask_text_for_privacy(kind, raw_text)
-        findings.append(
-            ImageFinding(
-                kind=kind,
-                bbox=(x, y, w, h),     # normalized 0..1
-                conf=float(min(1.0, conf)),  # OCR conf as a proxy
-                source="ocr+rules",
-                ver=f"{MODEL_VER['ocr']}|{MODEL_VER['pii_rules']}",
-                text=masked,           # masked text for UI tooltip
-            )
+    # 2) Find every PII match in each OCR line, keeping kinds whose OCR
+    #    confidence clears the policy threshold; each match gets the stretch
+    #    of its line's polygon that its characters cover
+    lines = _value("ocr")
+    hits = [
+        (i, m)
+        for i, line in enumerate(lines)
+        for m in find_pii(line.text)
+        if line.conf >= thresholds.get(m.kind, 0.0)
+    ]
+    if hits:
+        boxes = span_boxes(
+            [line.text for line in lines],
+            np.stack([line.quad for line in lines]),
+            np.array([i for i, _ in hits]),
+            np.array([m.start for _, m in hits]),
+            np.array([m.end for _, m in hits]),
         )
-        kind_counts[kind] = kind_counts.get(kind, 0) + 1
-        warnings.append(warning_for_kind(kind))
-    
-    for (x, y, w, h, conf) in faces(img_bytes, conf_th=0.5):
+        for (i, m), box in zip(hits, boxes.tolist()):
+            line = lines[i]
+            findings.append(
+                ImageFinding(
+                    kind=m.kind,
+                    bbox=tuple(box),     # normalized 0..1
+                    conf=float(min(1.0, line.conf)),  # OCR conf as a proxy
+                    source="ocr+rules",
+                    ver=f"{MODEL_VER['ocr']}|{MODEL_VER['pii_rules']}",
+                    text=mask_text_for_privacy(m.kind, line.text[m.start:m.end]),  # masked text for UI tooltip
+                )
+            )
+            kind_counts[m.kind] = kind_counts.get(m.kind, 0) + 1
+            warnings.append(warning_for_kind(m.kind))
+
+    for (x, y, w, h, conf) in _value("face"):
         findings.append(
             ImageFinding(
                 kind="face",
@@ -63,17 +306,17 @@ async def analyze_image(img_bytes: bytes, modes: str | None, policy: str | None)
             )
         )
         kind_counts["face"] = kind_counts.get("face", 0) + 1
-        warnings.append(warning_for_kind(kind))
+        warnings.append(warning_for_kind("face"))
     
     # 3) Landmarks detection
-    for (cls_name, x, y, w, h, conf) in landmarks(img_bytes, conf_th=0.25):
+    for (cls_name, x, y, w, h, conf) in _value("landmarks"):
         findings.append(
             ImageFinding(
                 kind=cls_name,             
                 bbox=(x, y, w, h),
                 conf=conf,
                 source="yolov8-landmarks",
-                ver="YOLOv8-landmarks-0.1",
+                ver=MODEL_VER["landmarks"],
                 text=None,
             )
         )
@@ -83,11 +326,15 @@ async def analyze_image(img_bytes: bytes, modes: str | None, policy: str | None)
     # 4) Risk score (weights defined in config/default.yaml)
     risk = score(kind_counts)
 
-    return AnalyzeImageResponse(
+    response = AnalyzeImageResponse(
         findings=findings,
         riskScore=risk,
-        imageShape=(0, 0),
+        imageShape=image_shape,
         coordSpace="normalized",
-        degraded=False,
+        degraded=bool(skipped),
         warnings=warnings,
+        stageTimingsMs=timings,
     )
+    if phash is not None and not reused and not response.degraded:
+        phash_index.add(phash, aspect, context, {name: _value(name) for name in reusable})
+    return response
@@ -0,0 +1,124 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Callable, Optional
+
+from src.core.config import settings
+
+class InferenceQueueFull(Exception):
+    pass
+
+class InferenceExecutor:
+    """
+    Runs blocking model calls on a dedicated thread pool so the event loop
+    (and /healthz) stays responsive while PaddleOCR/YOLO are busy.
+
+    Admission is bounded: at most `workers + max_queue` requests may be inside
+    the executor at once. Past that, `admit()` raises InferenceQueueFull and
+    the API answers 503 instead of letting latency grow without limit.
+    Bulk callers that would rather wait for a slot use `admit(wait=True)`.
+    Calls whose caller gave up on them (`abandon()`) keep a slot until they
+    really finish, since they still occupy a thread and the model locks.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 16):
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._in_flight = 0
+        self._abandoned = 0
+        self._waiters: deque = deque()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def abandoned(self) -> int:
+        return self._abandoned
+
+    def _busy(self) -> bool:
+        return self._in_flight + self._abandoned >= self.capacity
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Created lazily so importing this module never starts threads.
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+            return self._pool
+
+    @asynccontextmanager
+    async def admit(self, wait: bool = False):
+        if self._busy() and not wait:
+            raise InferenceQueueFull(f"Inference queue full ({self.capacity} requests in flight)")
+        while self._busy():
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                # pass on a wake-up we were given but can no longer use
+                if fut.done() and not fut.cancelled():
+                    self._wake_one()
+                raise
+        self._in_flight += 1
+        try:
+            yield self
+        finally:
+            self._in_flight -= 1
+            self._wake_one()
+
+    def _wake_one(self):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), partial(fn, *args, **kwargs))
+
+    def abandon(self, fut: "asyncio.Future"):
+        """
+        Counts a run() future its caller stopped waiting for (e.g. on a stage
+        timeout) against admission until the call finishes on its thread.
+        """
+        if fut.done():
+            return
+        self._abandoned += 1
+
+        def _finished(_):
+            self._abandoned -= 1
+            self._wake_one()
+
+        fut.add_done_callback(_finished)
+
+    def shutdown(self, wait: bool = True):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+inference_executor = InferenceExecutor(**settings.inference)
@@ -0,0 +1,140 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.models.frame import Frame
+from src.models.ocr import OcrLine, ocr
+from src.models.text_gate import text_gate
+
+Box = Tuple[float, float, float, float]  # normalized (x, y, w, h)
+
+def padded_regions(boxes: Sequence[Box], pad: float) -> List[Box]:
+    """
+    Grows each box by `pad` of its size on every side, clips it to the image
+    and merges overlapping results, so text spanning two detections is read
+    once and in one piece.
+    """
+    rects = [
+        [max(0.0, x - pad * w), max(0.0, y - pad * h), min(1.0, x + w + pad * w), min(1.0, y + h + pad * h)]
+        for x, y, w, h in boxes
+    ]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(len(rects) - 1, i, -1):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+    return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in rects]
+
+def _pixels(region: Box, width: int, height: int) -> Tuple[int, int, int, int]:
+    x, y, w, h = region
+    x1, y1 = round(x * width), round(y * height)
+    x2, y2 = max(x1 + 1, round((x + w) * width)), max(y1 + 1, round((y + h) * height))
+    return x1, y1, min(x2, width), min(y2, height)
+
+def remap_lines(lines: Sequence[OcrLine], rect: Tuple[float, float, float, float]) -> List[OcrLine]:
+    """Maps lines read from a crop at normalized (x, y, w, h) `rect` back to full-image coordinates."""
+    rx, ry, rw, rh = rect
+    scale = np.array([rw, rh], dtype=np.float32)
+    offset = np.array([rx, ry], dtype=np.float32)
+    return [
+        line._replace(
+            bbox=(rx + line.bbox[0] * rw, ry + line.bbox[1] * rh, line.bbox[2] * rw, line.bbox[3] * rh),
+            quad=line.quad * scale + offset,
+        )
+        for line in lines
+    ]
+
+def _outside(image: np.ndarray, regions: Sequence[Box]) -> np.ndarray:
+    # regions flattened to their median grey: solid blocks are never glyph-like,
+    # so the gate then only scores what the crops will not read
+    out = image.copy()
+    fill = np.median(image.reshape(-1, image.shape[-1]) if image.ndim == 3 else image, axis=0)
+    for region in regions:
+        x1, y1, x2, y2 = _pixels(region, image.shape[1], image.shape[0])
+        out[y1:y2, x1:x2] = fill
+    return out
+
+class OcrCascade:
+    """
+    OCR only where the landmarks model saw something that carries text.
+
+    The boxes of `classes` are padded by `pad`, merged and read as crops of
+    the OCR-sized frame; lines come back in full-image coordinates. The rest
+    of the image goes through the text gate, and only if it still looks like
+    text (or no region was found and the gate is off) is the whole frame read
+    instead. Counts how many frame pixels OCR saw, for /metrics.
+    """
+
+    def __init__(self, classes: Sequence[str], pad: float = 0.1):
+        self.classes = frozenset(classes)
+        self.pad = float(pad)
+        self.version = f"roi-{self.pad:g}-" + ",".join(sorted(self.classes))
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.full_frame = 0
+        self.cropped = 0
+        self.ocr_pixel_share = 0.0
+
+    def __call__(self, frame: Frame, detections: Optional[Sequence[tuple]]) -> List[OcrLine]:
+        # detections: landmarks() tuples (class_name, x, y, w, h, conf); None when that stage timed out
+        regions = padded_regions(
+            [tuple(d[1:5]) for d in detections or () if d[0] in self.classes], self.pad
+        )
+        if text_gate is not None:
+            full = text_gate(_outside(frame.image, regions) if regions else frame.image)
+        else:
+            full = not regions
+        if full:
+            lines, share = ocr(frame), 1.0
+        else:
+            lines, share = [], 0.0
+            for region in regions:
+                x1, y1, x2, y2 = _pixels(region, frame.width, frame.height)
+                crop = Frame(image=np.ascontiguousarray(frame.image[y1:y2, x1:x2]))
+                rect = (x1 / frame.width, y1 / frame.height, (x2 - x1) / frame.width, (y2 - y1) / frame.height)
+                lines.extend(remap_lines(ocr(crop), rect))
+                share += rect[2] * rect[3]
+        with self._lock:
+            self.requests += 1
+            self.full_frame += full
+            self.cropped += bool(regions) and not full
+            self.ocr_pixel_share += share
+        return lines
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "full_frame": self.full_frame,
+                "cropped": self.cropped,
+                "mean_ocr_pixel_share": self.ocr_pixel_share / self.requests if self.requests else 0.0,
+            }
+
+def _from_settings() -> Optional[OcrCascade]:
+    cfg = dict(settings.ocr.get("cascade", {}))
+    if not cfg.pop("enabled", False):
+        return None
+    return OcrCascade(**cfg)
+
+ocr_cascade = _from_settings()
@@ -0,0 +1,116 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np, cv2
+
+from src.core.config import settings
+
+def dhash(image: np.ndarray) -> int:
+    """
+    64-bit difference hash of a BGR image: sign of horizontal gradients on a
+    9x8 grayscale thumbnail. Stable under re-encoding and resizing.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+class NearDuplicateIndex:
+    """
+    Bounded index of dHashes of previously analyzed images.
+
+    `lookup` returns the stored result of the closest entry within
+    `max_distance` bits that was analyzed under the same context (model
+    versions, modes, policy) and has the same aspect ratio, so its normalized
+    boxes transfer as-is. When full, the least recently used entry is replaced.
+    Lookups are one vectorized XOR + popcount over all entries.
+    """
+
+    def __init__(self, max_distance: int = 4, max_entries: int = 4096, max_aspect_delta: float = 0.02):
+        self.max_distance = int(max_distance)
+        self.max_entries = max(1, int(max_entries))
+        self.max_aspect_delta = float(max_aspect_delta)
+        self._hashes = np.zeros(self.max_entries, dtype=np.uint64)
+        self._aspects = np.zeros(self.max_entries, dtype=np.float32)
+        self._contexts = np.full(self.max_entries, -1, dtype=np.int32)
+        self._last_used = np.zeros(self.max_entries, dtype=np.int64)
+        self._values: List[Optional[Dict[str, Any]]] = [None] * self.max_entries
+        self._context_ids: Dict[str, int] = {}
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _context_id(self, context: str) -> int:
+        cid = self._context_ids.get(context)
+        if cid is None:
+            cid = self._context_ids[context] = len(self._context_ids)
+        return cid
+
+    def lookup(self, h: int, aspect: float, context: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            n = self._size
+            cid = self._context_ids.get(context)
+            if cid is None or n == 0:
+                self.misses += 1
+                return None
+            dist = np.bitwise_count(self._hashes[:n] ^ np.uint64(h)).astype(np.int32)
+            ok = (
+                (self._contexts[:n] == cid)
+                & (dist <= self.max_distance)
+                & (np.abs(self._aspects[:n] - aspect) <= self.max_aspect_delta * aspect)
+            )
+            if not ok.any():
+                self.misses += 1
+                return None
+            i = int(np.argmin(np.where(ok, dist, np.iinfo(np.int32).max)))
+            self._clock += 1
+            self._last_used[i] = self._clock
+            self.hits += 1
+            return self._values[i]
+
+    def add(self, h: int, aspect: float, context: str, value: Dict[str, Any]):
+        with self._lock:
+            if self._size < self.max_entries:
+                i = self._size
+                self._size += 1
+            else:
+                i = int(np.argmin(self._last_used))
+            self._clock += 1
+            self._hashes[i] = np.uint64(h)
+            self._aspects[i] = aspect
+            self._contexts[i] = self._context_id(context)
+            self._last_used[i] = self._clock
+            self._values[i] = value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+def _from_settings() -> Optional[NearDuplicateIndex]:
+    cfg = dict(settings.near_duplicate)
+    if not cfg.pop("enabled", False):
+        return None
+    return NearDuplicateIndex(**cfg)
+
+phash_index = _from_settings()
@@ -0,0 +1,91 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np, cv2
+
+from src.core.config import settings
+
+METHODS = ("blur", "pixelate", "fill")
+FORMATS = {"jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, "image/jpeg"), "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, "image/webp")}
+
+class RedactionOptionError(ValueError):
+    pass
+
+def _regions(boxes: Iterable[Tuple[float, float, float, float]], pad: float, width: int, height: int) -> np.ndarray:
+    # normalized (x, y, w, h) -> (N, 4) padded, clipped pixel x1, y1, x2, y2; empty ones dropped
+    b = np.asarray(list(boxes), dtype=np.float64).reshape(-1, 4)
+    xy1 = b[:, :2] - pad * b[:, 2:]
+    xy2 = b[:, :2] + (1.0 + pad) * b[:, 2:]
+    px = np.concatenate((xy1, xy2), axis=1) * [width, height, width, height]
+    px = np.clip(np.rint(px), 0, [width, height, width, height]).astype(np.intp)
+    return px[(px[:, 2] > px[:, 0]) & (px[:, 3] > px[:, 1])]
+
+def redact(
+    image: np.ndarray,
+    boxes: Sequence[Tuple[float, float, float, float]],
+    method: str = "blur",
+    pad: float = 0.1,
+    blocks: int = 12,
+    fill_color: Sequence[int] = (0, 0, 0),
+) -> np.ndarray:
+    """
+    Copy of a BGR image with the normalized `boxes` blurred, pixelated or
+    filled. The frame is copied once; every box is then rewritten in place
+    through a view of its region, so the per-box cost is that of its own
+    pixels. Both blur and pixelate go through a thumbnail of about `blocks`
+    cells across the region, which is cheap for any box size and leaves
+    nothing legible.
+    """
+    if method not in METHODS:
+        raise RedactionOptionError(f"Unknown method: {method}; expected any of {', '.join(METHODS)}")
+    h, w = image.shape[:2]
+    out = image.copy()
+    for x1, y1, x2, y2 in _regions(boxes, pad, w, h).tolist():
+        roi = out[y1:y2, x1:x2]
+        if method == "fill":
+            roi[...] = fill_color
+            continue
+        rh, rw = roi.shape[:2]
+        cells = max(1, int(blocks))
+        small = cv2.resize(roi, (max(1, rw * cells // max(rw, rh)), max(1, rh * cells // max(rw, rh))), interpolation=cv2.INTER_AREA)
+        if method == "pixelate":
+            roi[...] = cv2.resize(small, (rw, rh), interpolation=cv2.INTER_NEAREST)
+        else:
+            small = cv2.GaussianBlur(small, (3, 3), 0)
+            roi[...] = cv2.resize(small, (rw, rh), interpolation=cv2.INTER_LINEAR)
+    return out
+
+def encode(image: np.ndarray, fmt: str = "jpeg", quality: int = 85) -> Tuple[bytes, str]:
+    """(encoded bytes, media type) of a BGR image as JPEG or WebP."""
+    if fmt not in FORMATS:
+        raise RedactionOptionError(f"Unknown format: {fmt}; expected any of {', '.join(FORMATS)}")
+    ext, flag, media_type = FORMATS[fmt]
+    ok, buf = cv2.imencode(ext, image, [flag, int(np.clip(quality, 1, 100))])
+    if not ok:
+        raise RedactionOptionError(f"Could not encode {fmt}")
+    return buf.tobytes(), media_type
+
+def redaction_defaults() -> dict:
+    cfg = settings.redact
+    return {
+        "method": cfg.get("method", "blur"),
+        "kinds": list(cfg.get("kinds", [])),
+        "pad": float(cfg.get("pad", 0.1)),
+        "blocks": int(cfg.get("blocks", 12)),
+        "fill_color": tuple(cfg.get("fill_color", (0, 0, 0))),
+        "format": cfg.get("format", "jpeg"),
+        "quality": int(cfg.get("quality", 85)),
+    }
@@ -0,0 +1,160 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from src.core.config import settings
+
+class ResultCache:
+    """
+    Two-tier cache of analysis results keyed by image content.
+
+    Memory tier: LRU bounded by `max_entries`, entries expire after `ttl_s`.
+    Disk tier (optional, when `disk_dir` is set): one JSON file per key so
+    results survive restarts; pruned oldest-first past `disk_max_entries`.
+    All methods block (hashing, file IO) and are meant to run off the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_s: float = 3600,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: int = 100_000,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_entries = max(1, int(disk_max_entries))
+        self._mem: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(img_bytes: bytes, context: Dict[str, Any]) -> str:
+        # context carries everything besides the pixels that changes the result
+        # (model versions, modes, policy)
+        h = hashlib.blake2b(img_bytes, digest_size=20)
+        h.update(json.dumps(context, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_s:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._mem[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._mem_put(key, value, now)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._mem_put(key, value, now)
+        self._disk_put(key, value, now)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._mem),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _mem_put(self, key: str, value: Dict[str, Any], now: float):
+        self._mem[key] = (now, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        # fan out over 256 subdirectories to keep directory listings short
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            if now - path.stat().st_mtime > self.ttl_s:
+                path.unlink(missing_ok=True)
+                return None
+            with path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, value: Dict[str, Any], now: float):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"result cache: could not write {path}: {e}")
+            return
+        self._disk_writes += 1
+        if self._disk_writes % 1000 == 0:
+            self._disk_prune()
+
+    def _disk_prune(self):
+        files = []
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                pass  # removed by another worker meanwhile
+        files.sort()
+        for _, path in files[: max(0, len(files) - self.disk_max_entries)]:
+            path.unlink(missing_ok=True)
+
+def _from_settings() -> Optional[ResultCache]:
+    cfg = dict(settings.result_cache)
+    if not cfg.pop("enabled", False):
+        return None
+    return ResultCache(**cfg)
+
+result_cache = _from_settings()
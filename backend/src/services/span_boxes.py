@@ -0,0 +1,69 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Sequence
+
+import numpy as np
+
+# Glyphs that take roughly half an average advance in the fonts OCR sees
+_NARROW = np.array([ord(c) for c in " .,:;'!|()[]{}iIlj1ft-/"], dtype=np.uint32)
+
+def span_boxes(
+    texts: Sequence[str],
+    quads: np.ndarray,
+    line_idx: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+) -> np.ndarray:
+    """
+    Sub-boxes of character spans inside OCR text lines.
+
+    texts:    recognized text of each line
+    quads:    (L, 4, 2) normalized line polygons, clockwise from top-left
+    line_idx, starts, ends: (M,) line index and code-point span of each match
+    Returns (M, 4) normalized (x, y, w, h).
+
+    A span's position along the line is its share of the line's estimated
+    glyph advances (narrow glyphs count half); the matching stretch of the top
+    (p0->p1) and bottom (p3->p2) edges bounds the sub-box, so rotated and
+    skewed lines are followed. All spans of all lines are mapped at once.
+    """
+    m = len(line_idx)
+    if m == 0:
+        return np.zeros((0, 4), dtype=np.float32)
+    line_idx = np.asarray(line_idx, dtype=np.intp)
+
+    # Cumulative advances over all lines back to back; line i owns
+    # cum[offsets[i]] .. cum[offsets[i] + len(texts[i])]
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.intp, count=len(texts))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    advances = np.where(np.isin(codes, _NARROW), 0.5, 1.0)
+    cum = np.concatenate(([0.0], np.cumsum(advances)))
+
+    base = offsets[line_idx]
+    first = cum[base]
+    total = np.maximum(cum[base + lengths[line_idx]] - first, 1e-9)
+    t0 = ((cum[base + np.asarray(starts, dtype=np.intp)] - first) / total)[:, None]
+    t1 = ((cum[base + np.asarray(ends, dtype=np.intp)] - first) / total)[:, None]
+
+    q = np.asarray(quads, dtype=np.float32)[line_idx]  # (M, 4, 2)
+    top = q[:, 1] - q[:, 0]
+    bottom = q[:, 2] - q[:, 3]
+    corners = np.stack(
+        (q[:, 0] + t0 * top, q[:, 0] + t1 * top, q[:, 3] + t1 * bottom, q[:, 3] + t0 * bottom),
+        axis=1,
+    )
+    lo = np.clip(corners.min(axis=1), 0.0, 1.0)
+    hi = np.clip(corners.max(axis=1), 0.0, 1.0)
+    return np.concatenate((lo, hi - lo), axis=1).astype(np.float32)
@@ -0,0 +1,92 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from src.services.inference_executor import InferenceExecutor, inference_executor
+
+@dataclass
+class StageResult:
+    name: str
+    value: Any = None
+    elapsed_ms: float = 0.0
+    timed_out: bool = False
+
+async def run_stages(
+    stages: Dict[str, Callable[[], Any]],
+    timeouts_ms: Optional[Dict[str, float]] = None,
+    executor: InferenceExecutor = inference_executor,
+    after: Optional[Dict[str, str]] = None,
+) -> Dict[str, StageResult]:
+    """
+    Fan-out/fan-in: every stage is submitted to its own executor worker at once,
+    and the call returns when the slowest one finishes.
+    Results are keyed by stage name in the order `stages` was given, so callers
+    merge findings deterministically regardless of which stage finished first.
+
+    A stage with an entry in `timeouts_ms` runs under that deadline, counted
+    from when a worker thread picks it up, so time spent queued behind other
+    requests does not count against it. When it overruns, its result comes
+    back with `timed_out=True` and no value; the worker thread cannot be
+    interrupted, so the call is handed to `executor.abandon()`, which keeps it
+    counted against admission until it finishes, and its output is discarded.
+
+    `after` maps a stage to the stage it depends on: it starts once that one
+    is done and its fn is called with that stage's value (None if it timed
+    out). Its budget and elapsed_ms cover only its own run.
+    """
+    timeouts_ms = timeouts_ms or {}
+    after = after or {}
+
+    async def _run(name: str, fn: Callable[[], Any]) -> StageResult:
+        budget_ms = timeouts_ms.get(name)
+        t0 = time.perf_counter()
+        if budget_ms is None:
+            value = await executor.run(fn)
+            return StageResult(name=name, value=value, elapsed_ms=(time.perf_counter() - t0) * 1000.0)
+
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        def _call():
+            loop.call_soon_threadsafe(started.set)
+            return fn()
+
+        fut = asyncio.ensure_future(executor.run(_call))
+        waiter = asyncio.ensure_future(started.wait())
+        await asyncio.wait({fut, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        try:
+            value = await asyncio.wait_for(asyncio.shield(fut), timeout=budget_ms / 1000.0)
+        except asyncio.TimeoutError:
+            executor.abandon(fut)
+            return StageResult(name=name, elapsed_ms=(time.perf_counter() - t0) * 1000.0, timed_out=True)
+        return StageResult(name=name, value=value, elapsed_ms=(time.perf_counter() - t0) * 1000.0)
+
+    tasks: Dict[str, "asyncio.Future[StageResult]"] = {}
+
+    async def _run_after(name: str, fn: Callable[[Any], Any], dep: str) -> StageResult:
+        value = (await tasks[dep]).value
+        return await _run(name, lambda: fn(value))
+
+    for name, fn in stages.items():
+        if name not in after:
+            tasks[name] = asyncio.ensure_future(_run(name, fn))
+    for name, fn in stages.items():
+        if name in after:
+            tasks[name] = asyncio.ensure_future(_run_after(name, fn, after[name]))
+    results = await asyncio.gather(*(tasks[name] for name in stages))
+    return {r.name: r for r in results}
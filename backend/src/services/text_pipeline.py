@@ -0,0 +1,38 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict, List
+
+from src.models.pii_from_text import PII_RULES_VER, find_pii, to_utf16_spans
+from src.schemas.analyze_text import AnalyzeTextResponse
+from src.schemas.common import TextFinding
+from src.services.risk_scoring import score
+from src.services.utils_warnings import warning_for_kind
+
+def analyze_text(text: str) -> AnalyzeTextResponse:
+    """
+    Scans `text` with the PII rules and returns every match with its UTF-16 span.
+    Rule matches are deterministic, so each carries conf 1.0.
+    """
+    matches = find_pii(text)
+    findings: List[TextFinding] = []
+    warnings: List[str] = []
+    kind_counts: Dict[str, int] = {}
+    for m, span in zip(matches, to_utf16_spans(text, matches)):
+        findings.append(TextFinding(kind=m.kind, span=span, conf=1.0, source="rules", ver=PII_RULES_VER))
+        kind_counts[m.kind] = kind_counts.get(m.kind, 0) + 1
+        warnings.append(warning_for_kind(m.kind))
+    return AnalyzeTextResponse(findings=findings, riskScore=score(kind_counts), warnings=warnings)
+
+def analyze_texts(texts: List[str]) -> List[AnalyzeTextResponse]:
+    return [analyze_text(t) for t in texts]
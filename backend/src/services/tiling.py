@@ -0,0 +1,185 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.models.frame import Frame
+from src.models.ocr import OcrLine
+from src.services.ocr_cascade import remap_lines
+
+Rect = Tuple[int, int, int, int]  # pixel x1, y1, x2, y2
+
+def tile_grid(width: int, height: int, tile: int, overlap: float) -> List[Rect]:
+    """
+    Tiles of at most `tile` px covering a width x height image, neighbours
+    overlapping by about `overlap` of a tile so an object cut by one seam is
+    whole in the next tile. Edge tiles are shifted inwards rather than shrunk.
+    """
+    def _starts(size: int) -> List[int]:
+        if size <= tile:
+            return [0]
+        n = int(np.ceil((size - tile) / (tile * (1.0 - overlap)))) + 1
+        return np.linspace(0, size - tile, n).round().astype(int).tolist()
+
+    return [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in _starts(height) for x in _starts(width)
+    ]
+
+def merge_boxes(
+    boxes: np.ndarray, scores: np.ndarray, groups: np.ndarray, iou_th: float = 0.5, ios_th: float = 0.8, union: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Greedy NMS over (N, 4) xyxy boxes from overlapping tiles, within each group
+    (class). Besides the usual IoU test, a box lying mostly (`ios_th`) inside
+    a better one is dropped: the same object cut off by a tile edge. When it is
+    the better box that lies inside the other, the kept box is grown to their
+    union (`union=True`), so the object keeps its full extent.
+    Returns kept indices, best first, and their (possibly grown) boxes.
+    """
+    boxes = boxes.astype(np.float64).copy()
+    order = np.argsort(-scores, kind="stable")
+    areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-12)
+    keep: List[int] = []
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter)
+        inside_kept = inter / areas[rest] > ios_th
+        contains_kept = inter / areas[i] > ios_th
+        same = (groups[rest] == groups[i]) & ((iou > iou_th) | inside_kept | contains_kept)
+        if union and same.any():
+            grown = np.concatenate((boxes[i:i + 1], boxes[rest[same & contains_kept]]))
+            boxes[i] = (*grown[:, :2].min(axis=0), *grown[:, 2:].max(axis=0))
+        order = rest[~same]
+    keep_idx = np.asarray(keep, dtype=np.intp)
+    return keep_idx, boxes[keep_idx]
+
+class Tiler:
+    """
+    Runs a detector stage over overlapping tiles of the decoded frame when its
+    usual single resized pass would shrink the image more than
+    `max_downscale`, and merges the per-tile results.
+
+    Tiles are views into the decoded frame, whose size decode_frame already
+    caps at max_image_mp. Each tiled call runs its tiles on a pool of its own,
+    `workers` at a time, so memory per call stays bounded however large the
+    upload was, and tiles of a stage that overran its deadline only hold up
+    that call's threads (still counted against admission, see
+    InferenceExecutor.abandon), not other requests' tiles.
+    Face and landmark tiles still go through the models' micro-batchers.
+    """
+
+    def __init__(self, stages: Dict[str, Dict[str, Any]], overlap: float = 0.2, workers: int = 4):
+        self.stages = {name: dict(cfg) for name, cfg in stages.items()}
+        self.overlap = float(overlap)
+        self.workers = max(1, int(workers))
+        self.version = f"tiles-{self.overlap:g}-" + ",".join(
+            f"{name}:{cfg['tile']}/{cfg['max_downscale']}" for name, cfg in sorted(self.stages.items())
+        )
+
+    def applies(self, stage: str, frame: Frame, working_side: Optional[int]) -> bool:
+        cfg = self.stages.get(stage)
+        if cfg is None or not working_side:
+            return False
+        return max(frame.shape) / working_side > cfg["max_downscale"]
+
+    def _rects(self, stage: str, frame: Frame) -> List[Rect]:
+        return tile_grid(frame.width, frame.height, int(self.stages[stage]["tile"]), self.overlap)
+
+    def rounds(self, stage: str, frame: Frame) -> int:
+        """
+        Model passes of a tiled run of `stage` over `frame` (the tiles, plus
+        the whole-frame pass of a detector stage) in waves of `workers`: about
+        how many single passes its wall time is, for scaling its deadline.
+        """
+        passes = len(self._rects(stage, frame)) + (stage != "ocr")
+        return math.ceil(passes / self.workers)
+
+    def _map(
+        self, stage: str, frame: Frame, fn: Callable[[Frame], list], whole: bool = False
+    ) -> Tuple[Optional[list], List[Tuple[Rect, list]]]:
+        rects = self._rects(stage, frame)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tile") as pool:
+            first = pool.submit(fn, frame) if whole else None
+            results = list(pool.map(lambda r: fn(Frame(image=frame.image[r[1]:r[3], r[0]:r[2]])), rects))
+            return (first.result() if first is not None else None), list(zip(rects, results))
+
+    def _norm(self, rect: Rect, frame: Frame) -> Tuple[float, float, float, float]:
+        x1, y1, x2, y2 = rect
+        return x1 / frame.width, y1 / frame.height, (x2 - x1) / frame.width, (y2 - y1) / frame.height
+
+    def detections(self, stage: str, frame: Frame, fn: Callable[[Frame], list]) -> list:
+        """
+        Tiled run of a faces()/landmarks()-style fn returning [(x, y, w, h, conf)]
+        or [(class_name, x, y, w, h, conf)] for a frame. The usual whole-frame
+        pass runs alongside the tiles and catches objects larger than the
+        overlap, which no single tile holds whole.
+        """
+        whole, tiles = self._map(stage, frame, fn, whole=True)
+        items = list(whole)
+        for rect, found in tiles:
+            rx, ry, rw, rh = self._norm(rect, frame)
+            for d in found:
+                *label, x, y, w, h, conf = d
+                items.append((*label, rx + x * rw, ry + y * rh, w * rw, h * rh, conf))
+        if not items:
+            return []
+        arr = np.array([d[-5:] for d in items], dtype=np.float64)
+        xyxy = np.concatenate((arr[:, :2], arr[:, :2] + arr[:, 2:4]), axis=1)
+        labels = [d[0] if len(d) == 6 else "" for d in items]
+        _, groups = np.unique(np.asarray(labels, dtype=object).astype(str), return_inverse=True)
+        keep, merged = merge_boxes(xyxy, arr[:, 4], groups)
+        return [
+            (*items[i][:-5], float(b[0]), float(b[1]), float(b[2] - b[0]), float(b[3] - b[1]), items[i][-1])
+            for i, b in zip(keep.tolist(), merged)
+        ]
+
+    def lines(self, frame: Frame, fn: Callable[[Frame], List[OcrLine]]) -> List[OcrLine]:
+        """
+        Tiled run of ocr(). A line read whole in one tile and cut off in its
+        neighbour is kept once, from the tile that read more of it; texts
+        cannot be joined, so line boxes are deduplicated but never grown.
+        """
+        lines: List[OcrLine] = []
+        for rect, found in self._map("ocr", frame, fn)[1]:
+            lines.extend(remap_lines(found, self._norm(rect, frame)))
+        if not lines:
+            return []
+        arr = np.array([l.bbox for l in lines], dtype=np.float64)
+        xyxy = np.concatenate((arr[:, :2], arr[:, :2] + arr[:, 2:]), axis=1)
+        completeness = np.array([len(l.text.strip()) + l.conf for l in lines])
+        keep, _ = merge_boxes(xyxy, completeness, np.zeros(len(lines), np.intp), union=False)
+        return [lines[i] for i in sorted(keep.tolist(), key=lambda i: (round(lines[i].bbox[1], 2), lines[i].bbox[0]))]
+
+def _from_settings() -> Optional[Tiler]:
+    cfg = dict(settings.tiling)
+    if not cfg.pop("enabled", False):
+        return None
+    overlap = cfg.pop("overlap", 0.2)
+    workers = cfg.pop("workers", 4)
+    return Tiler(cfg, overlap=overlap, workers=workers)
+
+tiler = _from_settings()
@@ -21,7 +21,12 @@ WARNING_MAP = {
     "document_id": "Document ID detected – may contain sensitive credentials",
     "address_sign": "Address sign detected – may reveal home or workplace",
     "credit_card": "Credit card number detected – financial risk",
+    "dob": "Potential date of birth detected – sensitive identifier",
+    "passport": "Potential passport number detected – sensitive identifier",
+    "iban": "Potential bank account number (IBAN) detected – financial risk",
+    "bic": "Bank code (BIC/SWIFT) detected – may reveal your bank",
 }
 
 def warning_for_kind(kind: str):
-    return WARNING_MAP.get(kind)
\ No newline at end of file
+    # scene elements from the landmarks model have no dedicated message
+    return WARNING_MAP.get(kind, f"{kind.capitalize()} detected – may reveal location or context")
\ No newline at end of file
@@ -0,0 +1,282 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np, cv2
+
+from src.core.config import settings
+from src.models.frame import Frame, decode_frame
+from src.schemas.analyze_video import VideoFrameResult
+from src.schemas.common import ImageFinding
+from src.services.image_pipeline import analyze_frame, parse_modes, resolve_policy
+from src.services.inference_executor import inference_executor
+from src.services.phash_index import dhash
+from src.services.risk_scoring import score
+
+class BoxTracker:
+    """
+    Moves boxes from frame to frame with sparse Lucas-Kanade optical flow.
+
+    On `reset` each box is seeded with corner features found inside it (a
+    small grid when the region is too flat to have any). `update` follows
+    the points into the next grey frame; a box moves by the median
+    displacement of its surviving points and scales by the change in their
+    spread. Boxes that lose their points are re-seeded where they stand.
+    Boxes are normalized (x, y, w, h); points live in the grey frame's pixels.
+    """
+
+    def __init__(self, max_points: int = 24):
+        self.max_points = int(max_points)
+        self.boxes = np.zeros((0, 4), dtype=np.float64)
+        self._gray: Optional[np.ndarray] = None
+        self._points = np.zeros((0, 2), dtype=np.float32)
+        self._owner = np.zeros(0, dtype=np.intp)
+
+    def reset(self, gray: np.ndarray, boxes: np.ndarray):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4).copy()
+        self._gray = gray
+        self._points = np.zeros((0, 2), dtype=np.float32)
+        self._owner = np.zeros(0, dtype=np.intp)
+        self._seed(range(len(self.boxes)))
+
+    def _seed(self, which):
+        h, w = self._gray.shape
+        points, owner = [self._points], [self._owner]
+        for i in which:
+            x, y, bw, bh = self.boxes[i]
+            x1, y1 = max(0, int(x * w)), max(0, int(y * h))
+            x2, y2 = min(w, int(np.ceil((x + bw) * w))), min(h, int(np.ceil((y + bh) * h)))
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                continue
+            mask = np.zeros_like(self._gray)
+            mask[y1:y2, x1:x2] = 255
+            found = cv2.goodFeaturesToTrack(self._gray, self.max_points, 0.01, 2, mask=mask)
+            if found is None or len(found) < 4:
+                gx, gy = np.meshgrid(np.linspace(x1, x2 - 1, 4), np.linspace(y1, y2 - 1, 4))
+                found = np.stack((gx.ravel(), gy.ravel()), axis=1)
+            found = np.asarray(found, dtype=np.float32).reshape(-1, 2)
+            points.append(found)
+            owner.append(np.full(len(found), i, dtype=np.intp))
+        self._points = np.concatenate(points)
+        self._owner = np.concatenate(owner)
+
+    def update(self, gray: np.ndarray) -> np.ndarray:
+        if self._gray is None or len(self.boxes) == 0:
+            self._gray = gray
+            return self.boxes.copy()
+        h, w = gray.shape
+        moved = np.zeros(len(self.boxes), dtype=bool)
+        if len(self._points):
+            nxt, status, _ = cv2.calcOpticalFlowPyrLK(
+                self._gray, gray, self._points.reshape(-1, 1, 2), None, winSize=(15, 15), maxLevel=2
+            )
+            nxt = nxt.reshape(-1, 2)
+            ok = (status.ravel() == 1) & (nxt[:, 0] >= 0) & (nxt[:, 0] < w) & (nxt[:, 1] >= 0) & (nxt[:, 1] < h)
+            for i in range(len(self.boxes)):
+                sel = ok & (self._owner == i)
+                if sel.sum() < 2:
+                    continue
+                old, new = self._points[sel], nxt[sel]
+                dx, dy = np.median(new - old, axis=0)
+                spread_old = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+                spread_new = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+                scale = float(np.clip(spread_new / spread_old, 0.8, 1.25)) if spread_old > 1.0 else 1.0
+                x, y, bw, bh = self.boxes[i]
+                cx, cy = x + bw / 2 + dx / w, y + bh / 2 + dy / h
+                bw, bh = bw * scale, bh * scale
+                self.boxes[i] = (cx - bw / 2, cy - bh / 2, bw, bh)
+                moved[i] = True
+            self._points, self._owner = nxt[ok], self._owner[ok]
+        self._gray = gray
+        # keep the normalized contract for the frontend
+        lo = np.clip(self.boxes[:, :2], 0.0, 1.0)
+        hi = np.clip(self.boxes[:, :2] + self.boxes[:, 2:], 0.0, 1.0)
+        self.boxes = np.concatenate((lo, hi - lo), axis=1)
+        lost = [i for i in range(len(self.boxes)) if not moved[i]]
+        if lost:
+            keep = ~np.isin(self._owner, lost)
+            self._points, self._owner = self._points[keep], self._owner[keep]
+            self._seed(lost)
+        return self.boxes.copy()
+
+class VideoDecodeError(ValueError):
+    pass
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class VideoSession:
+    """
+    Per-stream state of video analysis: frames come in one by one through
+    `process`, in order.
+
+    The full image pipeline runs only on keyframes: the first frame, every
+    `keyframe_interval` frames, and any frame whose dHash differs from the last
+    keyframe's by more than `scene_change_bits` (a cut or a big camera move).
+    In between, the keyframe's findings follow the picture with BoxTracker on
+    grey frames `track_side` px long.
+    """
+
+    def __init__(
+        self,
+        modes: Optional[str] = None,
+        policy: Optional[str] = None,
+        keyframe_interval: int = 15,
+        scene_change_bits: int = 20,
+        track_side: int = 320,
+    ):
+        # Raises InvalidOptionError for unknown modes/policies
+        self.stages = parse_modes(modes)
+        self.policy = resolve_policy(policy)
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.scene_change_bits = int(scene_change_bits)
+        self.track_side = int(track_side)
+        self.tracker = BoxTracker()
+        self.frames = 0
+        self.keyframes = 0
+        self._findings: List[ImageFinding] = []
+        self._risk = 0
+        self._degraded = False
+        self._key_hash: Optional[int] = None
+        self._since_key = 0
+        self._max_counts: Dict[str, int] = {}
+        self._t0: Optional[float] = None
+
+    def _prepare(self, image: np.ndarray) -> Tuple[Frame, np.ndarray, int]:
+        # large frames are scaled to max_image_mp, like decoded uploads
+        h, w = image.shape[:2]
+        max_px = settings.max_image_mp * 1e6
+        if settings.max_image_mp and h * w > max_px:
+            r = (max_px / (h * w)) ** 0.5
+            image = cv2.resize(image, (max(1, int(w * r)), max(1, int(h * r))), interpolation=cv2.INTER_AREA)
+        frame = Frame(image=image, source_shape=(h, w))
+        r = min(1.0, self.track_side / max(image.shape[:2]))
+        small = cv2.resize(image, (max(1, round(image.shape[1] * r)), max(1, round(image.shape[0] * r))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return frame, gray, dhash(gray)
+
+    async def process(self, image: np.ndarray, timestamp_ms: Optional[float] = None) -> VideoFrameResult:
+        """Analyzes the next BGR frame of the stream."""
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        frame, gray, phash = await inference_executor.run(self._prepare, image)
+        keyframe = (
+            self._key_hash is None
+            or self._since_key >= self.keyframe_interval
+            or _hamming(phash, self._key_hash) > self.scene_change_bits
+        )
+        if keyframe:
+            # a stream holds no executor slot between keyframes; each one queues for one
+            async with inference_executor.admit(wait=True):
+                res = await analyze_frame(frame, self.stages, self.policy, near_duplicates=False)
+            self._findings, self._risk, self._degraded = res.findings, res.riskScore, res.degraded
+            boxes = np.array([f.bbox for f in self._findings], dtype=np.float64).reshape(-1, 4)
+            await inference_executor.run(self.tracker.reset, gray, boxes)
+            self._key_hash, self._since_key = phash, 0
+            self.keyframes += 1
+            counts: Dict[str, int] = {}
+            for f in self._findings:
+                counts[f.kind] = counts.get(f.kind, 0) + 1
+            for kind, n in counts.items():
+                self._max_counts[kind] = max(self._max_counts.get(kind, 0), n)
+        else:
+            boxes = await inference_executor.run(self.tracker.update, gray)
+            self._findings = [f.model_copy(update={"bbox": tuple(map(float, b))}) for f, b in zip(self._findings, boxes)]
+        self._since_key += 1
+
+        self.frames += 1
+        elapsed = time.perf_counter() - self._t0
+        return VideoFrameResult(
+            index=self.frames - 1,
+            timestampMs=float(timestamp_ms) if timestamp_ms is not None else elapsed * 1000.0,
+            keyframe=keyframe,
+            findings=self._findings,
+            riskScore=self._risk,
+            runningRiskScore=score(self._max_counts),
+            fps=self.frames / elapsed if elapsed > 0 else 0.0,
+            degraded=self._degraded,
+        )
+
+    async def process_encoded(self, data: bytes) -> VideoFrameResult:
+        """Decodes one encoded image of a live stream and analyzes it as the next frame."""
+        # Raises ImageDecodeError / ImageTooLargeError like uploads
+        frame = await inference_executor.run(
+            decode_frame, data, max_mp=settings.max_image_mp, reject_mp=settings.reject_image_mp
+        )
+        return await self.process(frame.image)
+
+def video_session(modes: Optional[str] = None, policy: Optional[str] = None) -> VideoSession:
+    """A VideoSession with the `video` settings from the config."""
+    cfg = settings.video
+    return VideoSession(
+        modes=modes,
+        policy=policy,
+        keyframe_interval=cfg.get("keyframe_interval", 15),
+        scene_change_bits=cfg.get("scene_change_bits", 20),
+        track_side=cfg.get("track_side", 320),
+    )
+
+def probe_video(path: str) -> Tuple[int, float]:
+    """(frame count, fps) from the container; raises VideoDecodeError if OpenCV cannot read a frame."""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened() or not cap.read()[0]:
+            raise VideoDecodeError("Could not decode video")
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), float(cap.get(cv2.CAP_PROP_FPS))
+    finally:
+        cap.release()
+
+def iter_video_frames(path: str, max_frames: Optional[int] = None) -> Iterator[Tuple[np.ndarray, float]]:
+    """Decodes a video file with OpenCV, yielding (BGR frame, timestamp ms) in order."""
+    cap = cv2.VideoCapture(path)
+    try:
+        n = 0
+        while max_frames is None or n < max_frames:
+            ok, image = cap.read()
+            if not ok:
+                break
+            yield image, float(cap.get(cv2.CAP_PROP_POS_MSEC))
+            n += 1
+    finally:
+        cap.release()
+
+async def analyze_video(path: str, modes: Optional[str] = None, policy: Optional[str] = None) -> AsyncIterator[VideoFrameResult]:
+    """
+    Runs every frame of a video file through one VideoSession, yielding per-frame
+    results in order. Frames are decoded off the event loop, one at a time, so
+    only the frame being analyzed is held in memory.
+    """
+    session = video_session(modes, policy)
+    frames = iter_video_frames(path, settings.video.get("max_frames"))
+    done = object()
+    loop = asyncio.get_running_loop()
+    decoding: Optional[asyncio.Future] = None
+    try:
+        while True:
+            decoding = loop.run_in_executor(None, next, frames, done)
+            item = await asyncio.shield(decoding)
+            if item is done:
+                break
+            image, t_ms = item
+            yield await session.process(image, t_ms)
+    finally:
+        # closed early (the client went away): release the VideoCapture now,
+        # once the frame being decoded, if any, is out of the generator
+        if decoding is not None and not decoding.done():
+            decoding.add_done_callback(lambda _: frames.close())
+        else:
+            frames.close()
@@ -0,0 +1,52 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import tarfile
+import zipfile
+
+from src.services.batch_pipeline import ArchiveError, iter_tar_images, iter_zip_images
+
+def _zip(members) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+def test_oversized_zip_members_are_reported_not_read():
+    # 10 MB of zeros compresses to a few KB: a small bomb
+    archive = _zip([("a.png", b"ok"), ("bomb.png", b"\0" * (10 << 20)), ("notes.txt", b"x")])
+    items = list(iter_zip_images(io.BytesIO(archive), "up.zip", max_bytes=1 << 20))
+    assert [name for name, _ in items] == ["a.png", "bomb.png"]
+    assert items[0][1] == b"ok"
+    assert isinstance(items[1][1], ArchiveError)
+
+def test_corrupt_archives_end_with_an_error_item():
+    archive = _zip([("a.png", b"ok")])
+    items = list(iter_zip_images(io.BytesIO(archive[: len(archive) // 2]), "up.zip"))
+    assert items[-1][0] == "up.zip" and isinstance(items[-1][1], ArchiveError)
+
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, size in (("a.png", 10), ("big.png", 4096)):
+            info = tarfile.TarInfo(name)
+            info.size = size
+            tf.addfile(info, io.BytesIO(b"\1" * size))
+    data = buf.getvalue()
+    items = list(iter_tar_images(io.BytesIO(data), "up.tgz", max_bytes=1024))
+    assert items[0] == ("a.png", b"\1" * 10)
+    assert isinstance(items[1][1], ArchiveError)
+
+    items = list(iter_tar_images(io.BytesIO(data[:40]), "up.tgz"))
+    assert items[-1][0] == "up.tgz" and isinstance(items[-1][1], ArchiveError)
@@ -0,0 +1,62 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.models.batching import MicroBatcher
+
+def test_concurrent_calls_share_a_batch_and_get_their_own_result():
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [i * 2 for i in items]
+
+    batcher = MicroBatcher(double, max_batch=4, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(batcher, range(8)))
+
+    assert results == [i * 2 for i in range(8)]
+    assert all(len(b) <= 4 for b in batches)
+    assert len(batches) < 8
+
+def test_batch_errors_reach_every_caller():
+    def boom(items):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(boom, max_batch=2, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model failed"):
+        batcher(1)
+
+def test_a_hung_batch_fails_its_callers_and_the_batcher_recovers():
+    release = threading.Event()
+    hung = [True]
+
+    def slow(items):
+        if hung[0]:
+            release.wait(5)
+        return list(items)
+
+    batcher = MicroBatcher(slow, max_batch=2, max_wait_ms=1, timeout_ms=50)
+    t0 = time.monotonic()
+    with pytest.raises(TimeoutError):
+        batcher(1)
+    assert time.monotonic() - t0 < 1
+    hung[0] = False
+    release.set()
+    # the late result of the failed call did not kill the batch thread
+    assert batcher(2) == 2
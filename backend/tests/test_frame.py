@@ -0,0 +1,53 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from PIL import Image
+
+from src.models.frame import ImageDecodeError, ImageTooLargeError, decode_frame
+
+def test_decode_frame_matches_source_size():
+    with open("tests/assets/face.png", "rb") as f:
+        data = f.read()
+    frame = decode_frame(data)
+    w, h = Image.open("tests/assets/face.png").size
+    assert frame.shape == (h, w)
+    assert frame.image.shape == (h, w, 3)
+    assert frame.orientation == 1
+
+def test_decode_frame_rejects_garbage():
+    with pytest.raises(ImageDecodeError):
+        decode_frame(b"not an image")
+
+def _jpeg(w, h):
+    import numpy as np, cv2
+    img = np.random.default_rng(0).integers(0, 255, (h, w, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+def test_decode_frame_downsamples_above_max_mp():
+    frame = decode_frame(_jpeg(4000, 3000), max_mp=2)
+    assert frame.source_shape == (3000, 4000)
+    assert frame.height * frame.width <= 2e6
+    # aspect ratio is kept
+    assert abs(frame.width / frame.height - 4 / 3) < 0.01
+
+def test_decode_frame_rejects_above_reject_mp():
+    with pytest.raises(ImageTooLargeError):
+        decode_frame(_jpeg(4000, 3000), max_mp=2, reject_mp=10)
+
+def test_resized_is_cached_and_never_upscales():
+    frame = decode_frame(_jpeg(1600, 900))
+    small = frame.resized(640)
+    assert small.shape == (360, 640)
+    assert frame.resized(640) is small
+    assert frame.resized(4000) is frame
@@ -0,0 +1,105 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import cv2
+import numpy as np
+
+import src.services.image_pipeline as pipeline
+from src.models.frame import Frame
+from src.models.ocr import OcrLine, _quad_from_bbox
+from src.services.phash_index import NearDuplicateIndex
+from src.services.result_cache import ResultCache
+from src.services.stage_scheduler import StageResult
+from src.services.tiling import Tiler
+
+def _line(text):
+    bbox = (0.1, 0.1, 0.5, 0.05)
+    return OcrLine(text, bbox, 0.99, _quad_from_bbox(bbox))
+
+def test_near_duplicates_reuse_detections_but_rerun_ocr(monkeypatch):
+    calls = {"face": 0, "ocr": 0}
+    texts = iter(["mail alice@example.com", "mail bob@example.org"])
+
+    def fake_faces(frame, conf_th=0.5):
+        calls["face"] += 1
+        return [(0.6, 0.2, 0.2, 0.3, 0.9)]
+
+    def fake_read_text(frame, ocr_side):
+        calls["ocr"] += 1
+        return [_line(next(texts))]
+
+    monkeypatch.setattr(pipeline, "faces", fake_faces)
+    monkeypatch.setattr(pipeline, "_read_text", fake_read_text)
+    monkeypatch.setattr(pipeline, "phash_index", NearDuplicateIndex(max_distance=4))
+    frame = Frame(image=np.tile(np.arange(0, 256, 2, dtype=np.uint8), (96, 1))[:, :, None].repeat(3, axis=2))
+
+    async def run():
+        return [await pipeline.analyze_frame(frame, ("ocr", "face"), "strict") for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert calls == {"face": 1, "ocr": 2}
+    # the second image's own text, not the first one's
+    assert [f.text for f in first.findings if f.kind == "email"] != [f.text for f in second.findings if f.kind == "email"]
+    assert [f.kind for f in second.findings] == ["email", "face"]
+    assert second.riskScore == first.riskScore
+
+def test_tiled_stages_get_a_budget_per_round_and_skip_the_cascade(monkeypatch):
+    seen = {}
+
+    async def fake_run_stages(stages, timeouts_ms=None, after=None):
+        seen.update(timeouts_ms=timeouts_ms, after=after, ocr=stages["ocr"]())
+        return {name: StageResult(name=name, value=[]) for name in stages if name != "ocr"}
+
+    tiler = Tiler({"ocr": {"tile": 100, "max_downscale": 0.05}}, overlap=0.2, workers=2)
+    monkeypatch.setattr(pipeline, "tiler", tiler)
+    monkeypatch.setattr(pipeline, "run_stages", fake_run_stages)
+    monkeypatch.setattr(pipeline, "ocr_cascade", lambda *a: ["cascade"])
+    monkeypatch.setattr(pipeline, "_read_text", lambda frame, ocr_side: ["tiled"])
+    monkeypatch.setattr(pipeline, "phash_index", None)
+    frame = Frame(image=np.zeros((100, 400, 3), np.uint8))
+
+    asyncio.run(pipeline.analyze_frame(frame, ("ocr", "landmarks"), "strict"))
+    rounds = tiler.rounds("ocr", frame)
+    assert rounds > 1
+    assert seen["timeouts_ms"]["ocr"] == pipeline.settings.timeouts_ms["ocr"] * rounds
+    assert seen["timeouts_ms"]["landmarks"] == pipeline.settings.timeouts_ms["landmarks"]
+    assert seen["after"] == {} and seen["ocr"] == ["tiled"]
+
+def test_a_changed_threshold_misses_the_result_cache_and_the_near_duplicate_index(monkeypatch):
+    calls = []
+
+    def fake_faces(frame, conf_th=0.5):
+        calls.append(conf_th)
+        return [(0.6, 0.2, 0.2, 0.3, 0.9)]
+
+    monkeypatch.setattr(pipeline, "faces", fake_faces)
+    cache = ResultCache(max_entries=8)
+    monkeypatch.setattr(pipeline, "result_cache", cache)
+    monkeypatch.setattr(pipeline, "phash_index", NearDuplicateIndex(max_distance=4))
+    gradient = np.tile(np.arange(0, 256, 2, dtype=np.uint8), (96, 1))
+    png = cv2.imencode(".png", gradient)[1].tobytes()
+    jpegs = [cv2.imencode(".jpg", gradient, [cv2.IMWRITE_JPEG_QUALITY, q])[1].tobytes() for q in (90, 80)]
+
+    async def run():
+        await pipeline.analyze_image(png, "face", "strict")
+        await pipeline.analyze_image(png, "face", "strict")       # cached
+        await pipeline.analyze_image(jpegs[0], "face", "strict")  # near duplicate
+        monkeypatch.setitem(pipeline.settings.conf_thresholds["strict"], "face", 0.8)
+        await pipeline.analyze_image(jpegs[1], "face", "strict")  # not reusing the 0.6 detections
+        await pipeline.analyze_image(png, "face", "strict")       # not the 0.6 result
+
+    asyncio.run(run())
+    assert calls == [0.60, 0.8]
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,66 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+
+import pytest
+
+from src.services.inference_executor import InferenceExecutor, InferenceQueueFull
+
+def test_run_executes_off_the_event_loop():
+    ex = InferenceExecutor(workers=1, max_queue=0)
+
+    async def main():
+        async with ex.admit():
+            return await ex.run(threading.current_thread)
+
+    try:
+        assert asyncio.run(main()) is not threading.main_thread()
+    finally:
+        ex.shutdown()
+
+def test_admit_rejects_when_saturated():
+    ex = InferenceExecutor(workers=1, max_queue=1)
+
+    async def main():
+        async with ex.admit(), ex.admit():
+            with pytest.raises(InferenceQueueFull):
+                async with ex.admit():
+                    pass
+        # slots are released on exit
+        async with ex.admit():
+            assert ex.in_flight == 1
+
+    asyncio.run(main())
+
+def test_admit_wait_blocks_until_a_slot_frees():
+    ex = InferenceExecutor(workers=1, max_queue=0)
+    order = []
+
+    async def holder():
+        async with ex.admit():
+            order.append("first")
+            await asyncio.sleep(0.05)
+        order.append("released")
+
+    async def waiter():
+        await asyncio.sleep(0)
+        async with ex.admit(wait=True):
+            order.append("second")
+
+    async def main():
+        await asyncio.gather(holder(), waiter())
+
+    asyncio.run(main())
+    assert order == ["first", "released", "second"]
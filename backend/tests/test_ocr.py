@@ -0,0 +1,113 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.models import ocr as ocr_module
+from src.models.batching import MicroBatcher
+from src.models.ocr import SplitOcr, crop_quad, read_sorted
+from src.models.ocr_rec_onnx import OnnxTextRecognition, ctc_decode, rec_batch
+
+def test_crop_quad_rectifies_and_turns_tall_lines():
+    img = np.zeros((100, 200, 3), np.uint8)
+    img[20:40, 50:150] = 255
+    crop = crop_quad(img, np.array([[50, 20], [150, 20], [150, 40], [50, 40]]))
+    assert crop.shape[:2] == (20, 100)
+    assert crop.mean() > 250
+
+    tall = crop_quad(img, np.array([[10, 10], [30, 10], [30, 90], [10, 90]]))
+    assert tall.shape[:2] == (20, 80)
+
+def test_read_sorted_batches_by_aspect_and_keeps_order():
+    crops = [np.zeros((10, w), np.uint8) for w in (50, 10, 200, 30, 100)]
+    calls = []
+
+    def read(batch):
+        calls.append([c.shape[1] for c in batch])
+        return [(str(c.shape[1]), 1.0) for c in batch]
+
+    out = read_sorted(crops, read, batch_size=2)
+    assert [t for t, _ in out] == ["50", "10", "200", "30", "100"]
+    assert calls == [[10, 30], [50, 100], [200]]
+
+class _Det:
+    def predict(self, image):
+        yield {"dt_polys": [[[10, 10], [90, 10], [90, 30], [10, 30]], [[10, 50], [90, 50], [90, 70], [10, 70]]]}
+
+def test_split_engine_stops_waiting_for_a_stalled_recognizer(monkeypatch):
+    release = threading.Event()
+
+    def read(crops):
+        release.wait(5)
+        return [("x", 1.0)] * len(crops)
+
+    batcher = MicroBatcher(read, max_batch=1, max_wait_ms=0, name="test-rec")
+    monkeypatch.setattr(ocr_module, "_rec_batcher", batcher)
+    monkeypatch.setattr(ocr_module, "_REC_TIMEOUT_S", 0.05)
+    engine = SplitOcr(det=_Det(), cls=None, rec=None)
+    image = np.zeros((100, 100, 3), np.uint8)
+    with pytest.raises(TimeoutError):
+        ocr_module._predict_split(engine, image)
+    release.set()
+
+    page = ocr_module._predict_split(engine, image)
+    assert page["rec_texts"] == ["x", "x"]
+
+def test_rec_batch_keeps_aspect_and_pads_to_the_widest_line():
+    crops = [np.full((24, 48, 3), 255, np.uint8), np.full((10, 400, 3), 255, np.uint8)]
+    x = rec_batch(crops)
+    assert x.shape == (2, 3, 48, 1920)
+    assert (x[0, :, :, :96] == 1.0).all() and (x[0, :, :, 96:] == 0.0).all()
+    assert (x[1] == 1.0).all()
+
+def test_ctc_decode_collapses_repeats_and_drops_blanks():
+    charset = ["", "a", "b", " "]
+    steps = [1, 1, 0, 1, 2, 2, 0]  # a a _ a b b _
+    probs = np.full((1, len(steps), 4), 0.1, np.float32)
+    probs[0, np.arange(len(steps)), steps] = 0.5
+    assert ctc_decode(probs, charset) == [("aab", 0.5)]
+    assert ctc_decode(np.eye(4, dtype=np.float32)[None, [0, 0]], charset) == [("", 0.0)]
+
+def test_onnx_recognizer_reads_like_paddle_text_recognition(tmp_path):
+    import onnx
+    from onnx import TensorProto, helper
+
+    # stand-in recognizer: the channel that is brightest at each column wins
+    graph = helper.make_graph(
+        [
+            helper.make_node("ReduceMean", ["x"], ["m"], axes=[2], keepdims=0),
+            helper.make_node("Transpose", ["m"], ["t"], perm=[0, 2, 1]),
+            helper.make_node("Mul", ["t", "k"], ["s"]),
+            helper.make_node("Softmax", ["s"], ["probs"], axis=-1),
+        ],
+        "rec",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["n", 3, 48, "w"])],
+        [helper.make_tensor_value_info("probs", TensorProto.FLOAT, ["n", "w", 3])],
+        [helper.make_tensor("k", TensorProto.FLOAT, [], [10.0])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(tmp_path / "rec.onnx"))
+    (tmp_path / "dict.txt").write_text("g\n", encoding="utf-8")
+
+    rec = OnnxTextRecognition(str(tmp_path / "rec.onnx"), str(tmp_path / "dict.txt"))
+    green = np.zeros((20, 60, 3), np.uint8)
+    green[:, :, 1] = 255  # BGR: the recognizer sees channel 1
+    red = np.zeros((20, 60, 3), np.uint8)
+    red[:, :, 2] = 255
+    out = rec.predict([green, red, green], batch_size=2)
+    assert [r["rec_text"] for r in out] == ["g", " ", "g"]
+    assert all(0.99 < r["rec_score"] <= 1.0 for r in out)
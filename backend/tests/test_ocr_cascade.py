@@ -0,0 +1,45 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+import src.services.ocr_cascade as cascade
+from src.models.frame import Frame
+from src.models.ocr import OcrLine, _quad_from_bbox
+from src.services.ocr_cascade import OcrCascade, padded_regions
+
+def test_regions_are_padded_clipped_and_merged():
+    regions = padded_regions([(0.1, 0.1, 0.2, 0.1), (0.28, 0.1, 0.2, 0.1), (0.9, 0.9, 0.2, 0.2)], pad=0.1)
+    assert len(regions) == 2
+    np.testing.assert_allclose(regions[0], (0.08, 0.09, 0.42, 0.12), atol=1e-6)
+    np.testing.assert_allclose(regions[1], (0.88, 0.88, 0.12, 0.12), atol=1e-6)
+
+def test_crop_lines_map_back_to_the_full_image(monkeypatch):
+    seen = []
+
+    def fake_ocr(frame):
+        seen.append(frame.shape)
+        bbox = (0.0, 0.5, 1.0, 0.5)
+        return [OcrLine("SBA 1234 A", bbox, 0.9, _quad_from_bbox(bbox))]
+
+    monkeypatch.setattr(cascade, "ocr", fake_ocr)
+    frame = Frame(image=np.full((100, 200, 3), 128, np.uint8))
+    roi = OcrCascade(classes=["traffic sign"], pad=0.0)
+    detections = [("traffic sign", 0.5, 0.2, 0.25, 0.4, 0.8), ("car", 0.0, 0.0, 0.5, 0.5, 0.9)]
+
+    lines = roi(frame, detections)
+    assert seen == [(40, 50)]  # only the sign was read
+    np.testing.assert_allclose(lines[0].bbox, (0.5, 0.4, 0.25, 0.2), atol=1e-6)
+    np.testing.assert_allclose(lines[0].quad[2], (0.75, 0.6), atol=1e-6)
+    assert roi.stats()["cropped"] == 1
+    np.testing.assert_allclose(roi.stats()["mean_ocr_pixel_share"], 0.1)
@@ -0,0 +1,47 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cv2
+
+from src.models.frame import decode_frame
+from src.services.phash_index import NearDuplicateIndex, dhash
+
+def _load(path):
+    with open(path, "rb") as f:
+        return decode_frame(f.read()).image
+
+def test_dhash_survives_resize_and_recompression():
+    img = _load("tests/assets/face.png")
+    small = cv2.resize(img, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    recompressed = cv2.imdecode(cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, 40])[1], cv2.IMREAD_COLOR)
+    assert bin(dhash(img) ^ dhash(recompressed)).count("1") <= 4
+    other = _load("tests/assets/id.png")
+    assert bin(dhash(img) ^ dhash(other)).count("1") > 4
+
+def test_lookup_respects_distance_context_and_aspect():
+    index = NearDuplicateIndex(max_distance=2, max_entries=2)
+    index.add(0b1111, 1.5, "ctx", {"v": 1})
+    assert index.lookup(0b1110, 1.5, "ctx") == {"v": 1}
+    assert index.lookup(0b1000, 1.5, "ctx") is None    # 3 bits away
+    assert index.lookup(0b1111, 1.5, "other") is None  # different modes/policy
+    assert index.lookup(0b1111, 1.0, "ctx") is None    # different framing
+
+def test_least_recently_used_entry_is_replaced():
+    index = NearDuplicateIndex(max_distance=0, max_entries=2)
+    index.add(1, 1.0, "ctx", {"v": 1})
+    index.add(2, 1.0, "ctx", {"v": 2})
+    index.lookup(1, 1.0, "ctx")
+    index.add(3, 1.0, "ctx", {"v": 3})
+    assert index.lookup(2, 1.0, "ctx") is None
+    assert index.lookup(1, 1.0, "ctx") == {"v": 1}
+    assert index.stats()["entries"] == 2
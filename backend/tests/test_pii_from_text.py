@@ -0,0 +1,135 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import phonenumbers
+
+from src.models.pii_from_text import (
+    PHONE_RE, PII_RULES_VER, RULES, PhoneValidator, PiiMatch, classify_ocr_text, find_pii, phone_validator,
+    to_utf16_spans,
+)
+from src.services.text_pipeline import analyze_text
+
+def test_find_pii_returns_every_match_with_exact_spans():
+    s = "mail a.b@example.com or call +65 6123 4567"
+    matches = find_pii(s)
+    assert [(m.kind, s[m.start:m.end]) for m in matches] == [
+        ("email", "a.b@example.com"),
+        ("phone", "+65 6123 4567"),
+    ]
+
+def test_higher_priority_kind_wins_inside_an_overlapping_match():
+    # "DOB 16" is plate-shaped but overlaps the date, which ranks higher
+    s = "DOB 16/01/1971"
+    assert [(m.kind, s[m.start:m.end]) for m in find_pii(s)] == [("dob", "16/01/1971")]
+    assert classify_ocr_text(s) == "dob"
+    assert classify_ocr_text("Blk 12 Ang Mo Kio Ave 3") == "license_plate"
+    assert classify_ocr_text("thanks, see you again") is None
+
+def _unfiltered_cascade(s):
+    # every rule over the whole line, with no per-line prefilter
+    accepted = []
+    for kind, rx in RULES:
+        for m in rx.finditer(s):
+            start, end = m.span()
+            if kind == "phone":
+                cand = m.group(0)
+                start += len(cand) - len(cand.lstrip(" .-)"))
+                end = m.start() + len(cand.rstrip(" .-(+"))
+                if end <= start or not phone_validator(s[start:end]):
+                    continue
+            if not any(start < a.end and a.start < end for a in accepted):
+                accepted.append(PiiMatch(kind, start, end))
+    return sorted(accepted, key=lambda m: m.start)
+
+def _legacy_classify(s):
+    # classify_ocr_text before the prefilters and the phone memo: the first rule
+    # with any match, phones parsed whole by phonenumbers
+    s = s.strip()
+    for kind, rx in RULES:
+        if kind != "phone" and rx.search(s):
+            return kind
+        if kind == "phone":
+            for cand in PHONE_RE.findall(s):
+                try:
+                    if phonenumbers.is_valid_number(phonenumbers.parse(cand, phone_validator.default_region)):
+                        return kind
+                except phonenumbers.NumberParseException:
+                    pass
+    return None
+
+def test_prefiltered_rules_match_the_unfiltered_cascade():
+    rng = random.Random(0)
+    tokens = [
+        "+65", "6123", "4567", "98765432", "(", ")", ".", "-", " ", "+", "@", "x", "Tel:", "DOB",
+        "16/01/1971", "S1234567D", "AB123456", "GB82WEST12345698765432", "DEUTDEFF500", "ABCDEFGH",
+        "SGX 123 A", "Blk", "12", "Ave", "Road", "St.", "a.b@x.com", "4111 1111 1111 1111", "2024-01-02",
+    ]
+    for _ in range(3000):
+        s = "".join(rng.choice(tokens) + rng.choice(["", " "]) for _ in range(rng.randint(1, 8)))
+        assert find_pii(s) == _unfiltered_cascade(s), s
+        assert classify_ocr_text(s) == _legacy_classify(s), s
+
+def test_phone_validator_prefilters_and_memoizes():
+    v = PhoneValidator(default_region="SG", cache_size=16)
+    assert v("+65 6123 4567")
+    assert v("6123 4567")  # national number of the default region
+    assert not v("1234 5678 9012 3456 7890")  # more digits than any dialled number
+    assert not v("65 +6123 4567")
+    assert v.stats()["misses"] == 2  # shape rejects never reach phonenumbers
+    assert v("+65-6123-4567")  # same digits, answered from the memo
+    assert v.stats()["hits"] == 1
+    assert not PhoneValidator(default_region=None)("6123 4567")
+
+def test_phone_validator_ignores_punctuation_around_the_number():
+    v = PhoneValidator(default_region="SG", cache_size=16)
+    # phonenumbers reads from the first digit or "+" up to the last digit
+    assert v.normalize(") . +65 6123   4567") == "+6561234567"
+    assert v.normalize("6123 4567+") == "61234567"
+    assert v.normalize("++65 6123 4567") == "+6561234567"
+    assert v.normalize("(+65) 6123 4567") == "+6561234567"
+    assert v.normalize("6123 +4567") is None
+    s = "Tel ') . +65 6123   4567'"
+    assert [(m.kind, s[m.start:m.end]) for m in find_pii(s)] == [("phone", "+65 6123   4567")]
+    assert classify_ocr_text(") . +65 6123   4567") == "phone"
+
+def test_utf16_spans_count_astral_characters_twice():
+    s = "😀😀 a.b@example.com"
+    matches = find_pii(s)
+    assert [(m.start, m.end) for m in matches] == [(3, 18)]
+    assert to_utf16_spans(s, matches) == [(5, 20)]
+    # the UTF-16 span indexes the same characters in the UTF-16 encoding
+    units = s.encode("utf-16-le")
+    start, end = to_utf16_spans(s, matches)[0]
+    assert units[start * 2:end * 2].decode("utf-16-le") == "a.b@example.com"
+
+def test_analyze_text_scores_all_findings():
+    res = analyze_text("a.b@example.com, c.d@example.org")
+    assert [f.kind for f in res.findings] == ["email", "email"]
+    assert res.riskScore == 20
+
+def test_rules_version_names_the_phone_region():
+    assert PII_RULES_VER.endswith("+" + (phone_validator.default_region or "intl"))
+
+def test_texts_endpoint_answers_in_order_and_refuses_fields_it_would_ignore():
+    from fastapi.testclient import TestClient
+
+    from src.main import app
+
+    client = TestClient(app)
+    r = client.post("/analyze/texts", json={"texts": ["mail a@b.com", "nothing here"]})
+    assert r.status_code == 200
+    assert [[f["kind"] for f in res["findings"]] for res in r.json()["results"]] == [["email"], []]
+    assert client.post("/analyze/texts", json={"texts": ["x"], "policy": "lenient"}).status_code == 422
+    assert client.post("/analyze/texts", json={"texts": ["x"], "lang": "de"}).status_code == 422
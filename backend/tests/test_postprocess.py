@@ -0,0 +1,39 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from src.models.postprocess import box_tuples, class_box_tuples, normalize_detections
+
+def test_detections_are_clipped_normalized_and_filtered():
+    det = np.array([
+        [-10, 20, 50, 60, 0.9, 0],    # clipped on the left
+        [10, 10, 20, 20, 0.1, 0],     # below threshold
+        [250, 10, 300, 20, 0.9, 0],   # entirely outside: degenerate after clipping
+        [100, 50, 200, 100, 0.8, 7],  # unknown class
+    ], dtype=np.float32)
+    norm = normalize_detections(det, width=200, height=100, conf_th=0.5, num_classes=2)
+    np.testing.assert_allclose(norm, [[0.0, 0.2, 0.25, 0.4, 0.9, 0]], atol=1e-6)
+    assert normalize_detections(det, 200, 100, 0.5).shape == (2, 6)
+
+def test_tuples_share_one_top_left_convention():
+    norm = np.array([[0.1, 0.2, 0.3, 0.4, 0.9, 1]], dtype=np.float32)
+    (face,) = box_tuples(norm)
+    (lm,) = class_box_tuples(norm, ["person", "car"])
+    assert lm[0] == "car"
+    assert lm[1:] == face
+    np.testing.assert_allclose(face, (0.1, 0.2, 0.3, 0.4, 0.9), atol=1e-6)
+
+def test_empty_detections():
+    assert box_tuples(normalize_detections(np.zeros((0, 6)), 10, 10, 0.5)) == []
+    assert class_box_tuples(normalize_detections(np.zeros((0, 6)), 10, 10, 0.5), ["a"]) == []
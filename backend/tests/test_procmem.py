@@ -0,0 +1,26 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+
+import pytest
+
+from src.core.procmem import process_memory
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_process_memory_splits_shared_and_private_pages():
+    mem = process_memory()
+    assert set(mem) == {"rss_mb", "pss_mb", "shared_mb", "uss_mb"}
+    assert mem["rss_mb"] > 0
+    assert mem["uss_mb"] <= mem["pss_mb"] <= mem["rss_mb"]
+    assert abs(mem["shared_mb"] + mem["uss_mb"] - mem["rss_mb"]) < 1.0
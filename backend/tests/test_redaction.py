@@ -0,0 +1,105 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from src.services.redaction import RedactionOptionError, encode, redact
+
+def _image():
+    return np.random.default_rng(0).integers(0, 255, (200, 300, 3), dtype=np.uint8)
+
+@pytest.mark.parametrize("method", ["blur", "pixelate", "fill"])
+def test_only_the_padded_boxes_change(method):
+    img = _image()
+    out = redact(img, [(0.1, 0.1, 0.2, 0.25)], method, pad=0.1, fill_color=(0, 0, 255))
+    changed = np.any(out != img, axis=2)
+    ys, xs = np.nonzero(changed)
+    # box 30..90 x 20..70 px, grown by 10% of its size on each side
+    assert xs.min() >= 24 and xs.max() < 96 and ys.min() >= 15 and ys.max() < 75
+    assert changed[20:70, 30:90].mean() > 0.9
+    assert not np.shares_memory(out, img)
+    if method == "fill":
+        assert (out[40, 60] == (0, 0, 255)).all()
+    else:
+        # the region no longer carries the fine detail of the original
+        assert out[20:70, 30:90].astype(float).std() < img[20:70, 30:90].astype(float).std() / 2
+
+def test_encode_round_trips_and_rejects_unknown_options():
+    body, media_type = encode(_image(), "webp", quality=80)
+    assert media_type == "image/webp"
+    assert cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR).shape == (200, 300, 3)
+    with pytest.raises(RedactionOptionError):
+        encode(_image(), "gif")
+    with pytest.raises(RedactionOptionError):
+        redact(_image(), [], "smudge")
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import src.services.image_pipeline as pipeline
+    from src.main import app
+    from src.services.result_cache import ResultCache
+
+    calls = []
+
+    def fake_faces(frame, conf_th=0.5):
+        calls.append(frame.shape)
+        return [(0.1, 0.1, 0.2, 0.25, 0.9)]
+
+    monkeypatch.setattr(pipeline, "faces", fake_faces)
+    monkeypatch.setattr(pipeline, "result_cache", ResultCache(max_entries=8))
+    monkeypatch.setattr(pipeline, "phash_index", None)
+    monkeypatch.setattr(pipeline, "tiler", None)
+    test_client = TestClient(app)
+    test_client.face_calls = calls
+    return test_client
+
+def _upload():
+    return {"file": ("x.png", cv2.imencode(".png", _image())[1].tobytes(), "image/png")}
+
+def test_redact_endpoint_returns_the_redacted_image_and_reuses_cached_results(client):
+    responses = [client.post("/redact/image", files=_upload(), data={"modes": "face", "method": "fill"}) for _ in range(2)]
+    assert len(client.face_calls) == 1  # the second upload is a cache hit
+    for r in responses:
+        assert r.status_code == 200 and r.headers["content-type"] == "image/jpeg"
+        assert r.headers["X-Degraded"] == "false" and r.headers["X-Redacted"] == "1"
+        assert [f["kind"] for f in json.loads(r.headers["X-Findings"])] == ["face"]
+        assert int(r.headers["X-Risk-Score"]) > 0
+        out = cv2.imdecode(np.frombuffer(r.content, np.uint8), cv2.IMREAD_COLOR)
+        assert out.shape == (200, 300, 3) and out[40:60, 40:80].max() < 40
+
+    r = client.post("/redact/image", files=_upload(), data={"modes": "face", "kinds": "email", "format": "webp"})
+    assert r.headers["content-type"] == "image/webp" and r.headers["X-Redacted"] == "0"
+
+@pytest.mark.parametrize("data", [{"method": "smudge"}, {"format": "gif"}, {"kinds": "nope"}, {"modes": "nope"}, {"policy": "nope"}])
+def test_redact_endpoint_rejects_unknown_options(client, data):
+    assert client.post("/redact/image", files=_upload(), data=data).status_code == 400
+
+def test_redact_endpoint_refuses_to_return_a_partly_redacted_image(client, monkeypatch):
+    import src.services.image_pipeline as pipeline
+
+    def slow_faces(frame, conf_th=0.5):
+        time.sleep(0.2)
+        return [(0.1, 0.1, 0.2, 0.25, 0.9)]
+
+    monkeypatch.setattr(pipeline, "faces", slow_faces)
+    monkeypatch.setitem(pipeline.settings.timeouts_ms, "face", 20)
+    r = client.post("/redact/image", files=_upload(), data={"modes": "face"})
+    assert r.status_code == 503
+    assert r.headers["X-Degraded"] == "true" and "Retry-After" in r.headers
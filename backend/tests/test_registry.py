@@ -0,0 +1,37 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from src.models.registry import ModelRegistry
+
+def test_models_load_once_on_first_use():
+    calls = []
+    reg = ModelRegistry()
+    reg.register("m", lambda: calls.append(1) or object())
+    assert reg.status() == {"m": "unloaded"}
+    assert reg.get("m") is reg.get("m")
+    assert calls == [1]
+    assert reg.status() == {"m": "loaded"}
+
+def test_warm_up_runs_the_warmup_call_and_reports_readiness():
+    warmed = []
+    reg = ModelRegistry()
+    reg.register("good", lambda: "model", warmup=lambda: warmed.append(reg.get("good")))
+    reg.register("bad", lambda: 1 / 0)
+    assert not reg.warm_up()
+    assert warmed == ["model"]
+    assert reg.status() == {"good": "ready", "bad": "failed"}
+    assert reg.is_ready(["good"]) and not reg.is_ready(["good", "bad"])
+    with pytest.raises(ZeroDivisionError):
+        reg.get("bad")
@@ -0,0 +1,41 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from src.services.result_cache import ResultCache
+
+def test_key_depends_on_bytes_and_context():
+    k = ResultCache.make_key(b"img", {"modes": None})
+    assert k == ResultCache.make_key(b"img", {"modes": None})
+    assert k != ResultCache.make_key(b"img2", {"modes": None})
+    assert k != ResultCache.make_key(b"img", {"modes": "face"})
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # a is now most recent
+    cache.put("c", {"v": 3})           # evicts b
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl_s=0)
+    cache.put("a", {"v": 1})
+    assert cache.get("a") is None
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).put("abcd", {"v": 1})
+    fresh = ResultCache(disk_dir=str(tmp_path))
+    assert fresh.get("abcd") == {"v": 1}
+    assert fresh.stats()["disk_hits"] == 1
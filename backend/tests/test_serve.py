@@ -0,0 +1,44 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from src import serve
+
+def test_default_workers_follow_the_cgroup_cpu_quota_and_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(serve, "_CGROUP", tmp_path)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(64)), raising=False)
+    assert serve._default_workers(parent_mb=500, worker_mb=1024) == 64  # no limits
+
+    (tmp_path / "cpu.max").write_text("250000 100000\n")  # docker --cpus 2.5
+    assert serve._default_workers(parent_mb=500, worker_mb=1024) == 3
+
+    (tmp_path / "memory.max").write_text(f"{2560 * 1024 * 1024}\n")
+    assert serve._default_workers(parent_mb=500, worker_mb=1024) == 2
+    (tmp_path / "memory.max").write_text(f"{1024 * 1024 * 1024}\n")
+    assert serve._default_workers(parent_mb=500, worker_mb=1024) == 1  # never fewer than one
+
+def test_cgroup_v1_limits(tmp_path, monkeypatch):
+    monkeypatch.setattr(serve, "_CGROUP", tmp_path)
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+    assert serve._cgroup_cpus() is None
+    assert serve._cgroup_memory_mb() is None
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("400000\n")
+    (tmp_path / "memory" / "memory.limit_in_bytes").write_text(f"{4096 * 1024 * 1024}\n")
+    assert serve._cgroup_cpus() == 4.0
+    assert serve._cgroup_memory_mb() == 4096.0
@@ -64,4 +64,46 @@ def test_image_analyze_id():
         r = client.post("/analyze/image", files={"file": ("id.png", f, "image/png")})
     print("\nRESPONSE:", r.status_code, r.json()) 
 
-    assert r.status_code == 200
\ No newline at end of file
+    assert r.status_code == 200
+
+
+def test_images_analyze_streams_one_record_per_image():
+    import io, json, zipfile
+
+    with open("tests/assets/face.png", "rb") as f:
+        face = f.read()
+    with open("tests/assets/sample.png", "rb") as f:
+        sample = f.read()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a/face.png", face)
+        zf.writestr("a/notes.txt", "skipped")
+
+    r = client.post(
+        "/analyze/images",
+        files=[
+            ("files", ("sample.png", sample, "image/png")),
+            ("files", ("batch.zip", archive.getvalue(), "application/zip")),
+        ],
+    )
+    assert r.status_code == 200
+    records = [json.loads(line) for line in r.text.splitlines() if line]
+    assert sorted(rec["filename"] for rec in records) == ["a/face.png", "sample.png"]
+    assert all(rec["result"] is not None for rec in records)
+
+def test_image_analyze_modes_selects_stages():
+    with open("tests/assets/face.png", "rb") as f:
+        r = client.post(
+            "/analyze/image",
+            files={"file": ("face.png", f, "image/png")},
+            data={"modes": "face", "policy": "lenient"},
+        )
+    assert r.status_code == 200
+    data = r.json()
+    assert all(fd["kind"] == "face" for fd in data["findings"])
+    assert "ocr" not in data["stageTimingsMs"]
+
+def test_image_analyze_unknown_mode_is_400():
+    with open("tests/assets/face.png", "rb") as f:
+        r = client.post("/analyze/image", files={"file": ("face.png", f, "image/png")}, data={"modes": "x-ray"})
+    assert r.status_code == 400
@@ -0,0 +1,36 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from src.services.span_boxes import span_boxes
+
+def _quad(x, y, w, h):
+    return np.array([[x, y], [x + w, y], [x + w, y + h], [x, y + h]], dtype=np.float32)
+
+def test_spans_split_an_axis_aligned_line():
+    texts = ["abcdabcd", "xy"]
+    quads = np.stack([_quad(0.1, 0.2, 0.8, 0.1), _quad(0.0, 0.5, 0.2, 0.1)])
+    boxes = span_boxes(texts, quads, np.array([0, 0, 1]), np.array([0, 4, 0]), np.array([4, 8, 2]))
+    np.testing.assert_allclose(boxes, [[0.1, 0.2, 0.4, 0.1], [0.5, 0.2, 0.4, 0.1], [0.0, 0.5, 0.2, 0.1]], atol=1e-6)
+
+def test_narrow_glyphs_take_less_of_the_line():
+    boxes = span_boxes(["mm.."], _quad(0, 0, 1, 0.1)[None], np.array([0]), np.array([0]), np.array([2]))
+    # two full advances out of three
+    np.testing.assert_allclose(boxes[0, 2], 2 / 3, atol=1e-6)
+
+def test_spans_follow_a_rotated_line():
+    # 45 degree line from (0.1, 0.1) towards the lower right, zero height
+    q = np.array([[[0.1, 0.1], [0.5, 0.5], [0.5, 0.5], [0.1, 0.1]]], dtype=np.float32)
+    boxes = span_boxes(["abcd"], q, np.array([0]), np.array([2]), np.array([4]))
+    np.testing.assert_allclose(boxes, [[0.3, 0.3, 0.2, 0.2]], atol=1e-6)
@@ -0,0 +1,104 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+
+from src.services.inference_executor import InferenceExecutor
+from src.services.stage_scheduler import run_stages
+
+def _sleep_then(value, seconds):
+    def fn():
+        time.sleep(seconds)
+        return value
+    return fn
+
+def test_stages_run_in_parallel_and_merge_in_order():
+    ex = InferenceExecutor(workers=3, max_queue=0)
+    stages = {
+        "slow": _sleep_then("a", 0.2),
+        "fast": _sleep_then("b", 0.0),
+        "mid": _sleep_then("c", 0.1),
+    }
+    try:
+        t0 = time.perf_counter()
+        results = asyncio.run(run_stages(stages, executor=ex))
+        elapsed = time.perf_counter() - t0
+    finally:
+        ex.shutdown()
+
+    assert list(results) == ["slow", "fast", "mid"]
+    assert [r.value for r in results.values()] == ["a", "b", "c"]
+    assert elapsed < 0.3
+    assert results["slow"].elapsed_ms >= 200
+
+def test_stage_over_budget_is_abandoned():
+    ex = InferenceExecutor(workers=2, max_queue=0)
+    stages = {
+        "slow": _sleep_then("a", 0.5),
+        "fast": _sleep_then("b", 0.0),
+    }
+    try:
+        t0 = time.perf_counter()
+        results = asyncio.run(run_stages(stages, timeouts_ms={"slow": 50, "fast": 1000}, executor=ex))
+        elapsed = time.perf_counter() - t0
+    finally:
+        ex.shutdown(wait=False)
+
+    assert elapsed < 0.4
+    assert results["slow"].timed_out and results["slow"].value is None
+    assert not results["fast"].timed_out and results["fast"].value == "b"
+
+def test_dependent_stage_receives_prerequisite_value():
+    ex = InferenceExecutor(workers=2, max_queue=0)
+    stages = {
+        "ocr": lambda boxes: f"read {boxes}",
+        "landmarks": _sleep_then("2 signs", 0.05),
+        "face": _sleep_then("1 face", 0.0),
+    }
+    try:
+        results = asyncio.run(run_stages(stages, executor=ex, after={"ocr": "landmarks"}))
+    finally:
+        ex.shutdown()
+
+    assert list(results) == ["ocr", "landmarks", "face"]
+    assert results["ocr"].value == "read 2 signs"
+    assert results["ocr"].elapsed_ms < results["landmarks"].elapsed_ms
+
+def test_budget_starts_when_a_worker_picks_the_stage_up():
+    # one worker: "queued" waits 0.15 s for "busy" to free the thread, longer
+    # than its own 0.1 s budget, but runs well within it once started
+    ex = InferenceExecutor(workers=1, max_queue=0)
+    stages = {"busy": _sleep_then("a", 0.15), "queued": _sleep_then("b", 0.01)}
+    try:
+        results = asyncio.run(run_stages(stages, timeouts_ms={"queued": 100}, executor=ex))
+    finally:
+        ex.shutdown()
+    assert not results["queued"].timed_out and results["queued"].value == "b"
+
+def test_abandoned_stage_keeps_its_admission_slot():
+    ex = InferenceExecutor(workers=2, max_queue=0)
+
+    async def main():
+        async with ex.admit():
+            res = await run_stages({"slow": _sleep_then("a", 0.2)}, timeouts_ms={"slow": 20}, executor=ex)
+        assert res["slow"].timed_out
+        # the request let go of admit(), but its abandoned call still runs
+        assert ex.in_flight == 0 and ex.abandoned == 1
+        await asyncio.sleep(0.3)
+        assert ex.abandoned == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        ex.shutdown()
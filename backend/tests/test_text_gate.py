@@ -0,0 +1,64 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cv2
+import numpy as np
+
+from src.models.frame import Frame
+from src.models.text_gate import TextGate, text_score
+
+def _printed(text: str) -> np.ndarray:
+    img = np.full((400, 600, 3), 255, np.uint8)
+    cv2.putText(img, text, (20, 200), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    return img
+
+def _sky() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    ramp = np.tile(np.linspace(120, 220, 480)[:, None, None], (1, 640, 3))
+    return cv2.GaussianBlur((ramp + rng.integers(0, 6, ramp.shape)).astype(np.uint8), (5, 5), 0)
+
+def test_printed_line_scores_above_smooth_images():
+    assert text_score(_printed("Hello World 123")) >= 4
+    assert text_score(_sky()) == 0
+    assert text_score(np.zeros((300, 300), np.uint8)) == 0
+
+def test_gate_skips_textless_images_and_counts():
+    gate = TextGate(coarse_side=320, min_score=4)
+    assert gate(_printed("Card 4111 1111")) is True
+    assert gate(_sky()) is False
+    stats = gate.stats()
+    assert stats["checked"] == 2 and stats["skipped"] == 1
+    assert stats["skip_rate"] == 0.5
+
+def _page(width: int, height: int, scale: float, ink: int = 0, paper: int = 255) -> np.ndarray:
+    # lines of small print filling a large canvas, as on a photographed page or a screenshot
+    img = np.full((height, width, 3), paper, np.uint8)
+    step = int(40 * scale)
+    for y in range(2 * step, height - step, step):
+        cv2.putText(img, "Invoice 40213 Jane Tan 12 Ang Mo Kio Ave 3 total SGD 1,240.00" * 3,
+                    (step, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (ink, ink, ink), max(1, int(2 * scale)))
+    return img
+
+def test_gate_sees_small_print_on_large_canvases_at_the_ocr_size():
+    gate = TextGate(coarse_side=320, min_score=4)
+    for page in (
+        _page(4000, 3000, 1.6),  # A4 page photographed at 12 MP
+        _page(2400, 1080, 0.5),  # phone screenshot
+        _page(1600, 1200, 0.45, ink=230, paper=30),  # dark mode
+        _page(1000, 800, 0.4),
+    ):
+        ocr_copy = Frame(image=page).resized(1920).image
+        # the thumbnail alone loses the print below the glyph floor
+        assert text_score(ocr_copy, 320) < 4
+        assert gate(ocr_copy) is True
+    assert gate(Frame(image=_sky()).resized(1920).image) is False
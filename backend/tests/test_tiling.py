@@ -0,0 +1,65 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cv2
+import numpy as np
+
+from src.models.frame import Frame
+from src.services.tiling import Tiler, merge_boxes, tile_grid
+
+def test_tiles_cover_the_image_with_overlap():
+    rects = tile_grid(3000, 1000, tile=1000, overlap=0.2)
+    assert all(x2 - x1 == 1000 and y2 - y1 == 1000 for x1, y1, x2, y2 in rects)
+    xs = sorted({x1 for x1, _, _, _ in rects})
+    assert xs[0] == 0 and xs[-1] == 2000
+    assert all(b - a <= 800 for a, b in zip(xs, xs[1:]))
+    assert tile_grid(500, 400, tile=1000, overlap=0.2) == [(0, 0, 500, 400)]
+
+def test_merge_drops_cut_off_copies_and_grows_to_the_union():
+    boxes = np.array([
+        [0.10, 0.10, 0.20, 0.20],  # full face
+        [0.10, 0.10, 0.15, 0.20],  # same face cut by a tile edge
+        [0.50, 0.50, 0.60, 0.60],  # another face
+        [0.50, 0.50, 0.60, 0.60],  # same place, other class
+    ])
+    keep, merged = merge_boxes(boxes, np.array([0.6, 0.9, 0.8, 0.5]), np.array([0, 0, 0, 1]))
+    assert sorted(keep.tolist()) == [1, 2, 3]
+    # the better-scored partial box takes over the full extent
+    np.testing.assert_allclose(merged[keep.tolist().index(1)], [0.10, 0.10, 0.20, 0.20])
+
+def _squares(frame):
+    # stand-in detector: one (x, y, w, h, conf) per white blob, normalized
+    n, _, stats, _ = cv2.connectedComponentsWithStats((frame.image[:, :, 0] > 128).astype(np.uint8))
+    return [(x / frame.width, y / frame.height, w / frame.width, h / frame.height, 0.9) for x, y, w, h, _ in stats[1:]]
+
+def test_tiled_detections_map_back_and_merge_across_seams():
+    img = np.zeros((1000, 6000, 3), np.uint8)
+    img[500:540, 100:140] = 255     # inside one tile
+    img[200:260, 1980:2040] = 255   # across a tile seam
+    tiler = Tiler({"face": {"tile": 1000, "max_downscale": 4}}, overlap=0.2, workers=2)
+    frame = Frame(image=img)
+    assert tiler.applies("face", frame, 640)
+    assert not tiler.applies("face", Frame(image=img[:, :2000]), 640)
+
+    found = sorted(tiler.detections("face", frame, _squares))
+    assert len(found) == 2
+    np.testing.assert_allclose(found[0][:4], (100 / 6000, 0.5, 40 / 6000, 0.04), atol=1e-6)
+    np.testing.assert_allclose(found[1][:4], (1980 / 6000, 0.2, 60 / 6000, 0.06), atol=1e-6)
+
+def test_rounds_count_passes_in_waves_of_workers():
+    frame = Frame(image=np.zeros((1000, 6000, 3), np.uint8))
+    tiler = Tiler({"face": {"tile": 1000, "max_downscale": 4}, "ocr": {"tile": 1000, "max_downscale": 4}}, overlap=0.2, workers=2)
+    tiles = len(tile_grid(6000, 1000, tile=1000, overlap=0.2))
+    # detector stages add the whole-frame pass
+    assert tiler.rounds("face", frame) == -(-(tiles + 1) // 2)
+    assert tiler.rounds("ocr", frame) == -(-tiles // 2)
@@ -0,0 +1,178 @@
+# Copyright 2025 Obscura
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from fastapi import HTTPException, Request
+from starlette import formparsers
+from starlette.websockets import WebSocketDisconnect
+
+import src.api.routes_analyze as routes_analyze
+import src.services.video_pipeline as video
+from src.schemas.analyze_image import AnalyzeImageResponse
+from src.schemas.common import ImageFinding
+from src.services.risk_scoring import score
+from src.services.video_pipeline import BoxTracker, VideoSession
+
+_PATCH = np.random.default_rng(0).integers(0, 255, (40, 40, 3), dtype=np.uint8)
+
+def _scene(x: int, y: int = 60, size=(240, 320)) -> np.ndarray:
+    img = np.full((*size, 3), 90, np.uint8)
+    img[y:y + 40, x:x + 40] = _PATCH
+    return img
+
+def _gray(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+def test_tracker_follows_a_moving_patch():
+    tracker = BoxTracker()
+    tracker.reset(_gray(_scene(40)), np.array([[40 / 320, 60 / 240, 40 / 320, 40 / 240]]))
+    for step in range(1, 11):
+        box = tracker.update(_gray(_scene(40 + 4 * step)))[0]
+    np.testing.assert_allclose(box * [320, 240, 320, 240], [80, 60, 40, 40], atol=2.0)
+
+async def _fake_analyze_frame(frame, stages, policy, near_duplicates=True):
+    # stand-in for the model stages: one "face" wherever the patch is
+    gray = _gray(frame.image)
+    ys, xs = np.nonzero(np.abs(gray.astype(int) - 90) > 30)
+    h, w = gray.shape
+    face = ImageFinding(
+        kind="face", bbox=(xs.min() / w, ys.min() / h, 40 / w, 40 / h), conf=0.9, source="test", ver="test"
+    )
+    return AnalyzeImageResponse(findings=[face], riskScore=20)
+
+def test_keyframes_on_interval_and_scene_change(monkeypatch):
+    monkeypatch.setattr(video, "analyze_frame", _fake_analyze_frame)
+    session = VideoSession(keyframe_interval=4, scene_change_bits=20)
+    cut = _scene(200, y=150)
+    cut[:, :, :] = np.clip(cut.astype(int) + np.linspace(0, 160, 320, dtype=int)[None, :, None], 0, 255)
+    frames = [_scene(40 + 2 * i) for i in range(6)] + [cut]
+
+    async def run():
+        return [await session.process(f, timestamp_ms=i * 33.0) for i, f in enumerate(frames)]
+
+    results = asyncio.run(run())
+    assert [r.keyframe for r in results] == [True, False, False, False, True, False, True]
+    # tracked frames carry the keyframe's findings, moved with the picture
+    np.testing.assert_allclose(results[3].findings[0].bbox[0] * 320, 46, atol=2.0)
+    assert results[3].riskScore == 20
+    assert results[-1].runningRiskScore == score({"face": 1})  # one face at most in any frame
+    assert results[-1].fps > 0 and session.keyframes == 3
+
+def test_video_upload_streams_one_record_per_frame(monkeypatch, tmp_path):
+    from src.main import app
+
+    monkeypatch.setattr(video, "analyze_frame", _fake_analyze_frame)
+    path = str(tmp_path / "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (320, 240))
+    for i in range(10):
+        writer.write(_scene(40 + 3 * i))
+    writer.release()
+
+    client = TestClient(app)
+    with open(path, "rb") as f:
+        r = client.post("/analyze/video", files={"file": ("clip.mp4", f, "video/mp4")})
+    assert r.status_code == 200
+    records = [json.loads(line) for line in r.text.splitlines() if line]
+    assert [rec["index"] for rec in records] == list(range(10))
+    assert records[0]["keyframe"] and all(rec["findings"] for rec in records)
+
+    r = client.post("/analyze/video", files={"file": ("x.mp4", b"not a video", "video/mp4")})
+    assert r.status_code == 400
+
+def test_video_upload_over_the_limit_is_refused_before_it_is_read(monkeypatch):
+    from src.main import app
+
+    monkeypatch.setitem(video.settings.video, "max_upload_mb", 1)
+    client = TestClient(app)
+    big = b"\0" * (2 << 20)
+    r = client.post("/analyze/video", files={"file": ("clip.mp4", big, "video/mp4")})
+    assert r.status_code == 413
+
+    # no Content-Length (chunked): cut off while streaming
+    boundary = "xyz"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="clip.mp4"\r\nContent-Type: video/mp4\r\n\r\n'
+    body = [head.encode()] + [b"\0" * (1 << 16)] * 32 + [f"\r\n--{boundary}--\r\n".encode()]
+    r = client.post(
+        "/analyze/video", content=iter(body), headers={"content-type": f"multipart/form-data; boundary={boundary}"}
+    )
+    assert r.status_code == 413
+
+    # the test client sends a body in one piece; feed it chunk by chunk to see
+    # that what was spooled before the limit is closed
+    spooled = []
+
+    class SpyFile(formparsers.SpooledTemporaryFile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            spooled.append(self)
+
+    monkeypatch.setattr(formparsers, "SpooledTemporaryFile", SpyFile)
+    messages = iter([{"type": "http.request", "body": chunk, "more_body": True} for chunk in body])
+
+    async def receive():
+        return next(messages)
+
+    scope = {"type": "http", "headers": [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())]}
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(routes_analyze._capped_form(Request(scope, receive), 1 << 20))
+    assert e.value.status_code == 413
+    assert spooled and all(f.closed for f in spooled)
+
+def test_closing_a_video_stream_early_releases_the_decoder(monkeypatch):
+    closed = []
+
+    def fake_frames(path, max_frames=None):
+        try:
+            for i in range(100):
+                yield _scene(40 + i % 50), i * 33.0
+        finally:
+            closed.append(path)
+
+    monkeypatch.setattr(video, "analyze_frame", _fake_analyze_frame)
+    monkeypatch.setattr(video, "iter_video_frames", fake_frames)
+
+    async def run():
+        results = video.analyze_video("clip.mp4")
+        first = await results.__anext__()
+        await results.aclose()
+        return first
+
+    assert asyncio.run(run()).index == 0
+    assert closed == ["clip.mp4"]
+
+def test_stream_answers_every_message_in_order(monkeypatch):
+    from src.main import app
+
+    monkeypatch.setattr(video, "analyze_frame", _fake_analyze_frame)
+    client = TestClient(app)
+    with client.websocket_connect("/analyze/stream?modes=face") as ws:
+        ws.send_bytes(cv2.imencode(".png", _scene(40))[1].tobytes())
+        first = ws.receive_json()
+        assert first["keyframe"] and first["findings"][0]["kind"] == "face"
+        ws.send_text("hello")
+        assert "error" in ws.receive_json()
+        ws.send_bytes(b"not an image")
+        assert "error" in ws.receive_json()
+        ws.send_bytes(cv2.imencode(".png", _scene(44))[1].tobytes())
+        assert ws.receive_json()["index"] == 1
+
+    with pytest.raises(WebSocketDisconnect) as e:
+        with client.websocket_connect("/analyze/stream?modes=nope") as ws:
+            ws.receive_json()
+    assert e.value.code == 1008